@@ -0,0 +1,212 @@
+import os
+import asyncio
+import json
+import logging
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedFileValue:
+    """One expiring value shared by every worker process on the host through a
+    small JSON file, with an O_EXCL lock file so only one process refreshes it"""
+
+    def __init__(self, path: str, lock_timeout: float = 10.0):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.lock_timeout = lock_timeout
+        self._lock_owner: Optional[str] = None
+
+    def read(self) -> Optional[Tuple[Any, float]]:
+        """Return (value, expires_at) if present and unexpired (wall-clock seconds)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            value, expires_at = data["value"], float(data["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if time.time() >= expires_at:
+            return None
+        return value, expires_at
+
+    def write(self, value: Any, expires_at: float) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+        try:
+            # Created owner-only from the start; the value may be a bearer token
+            fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"value": value, "expires_at": expires_at}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("⚠️ Could not write shared cache %s: %s", self.path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def try_lock(self) -> bool:
+        # Break a lock left behind by a crashed process, but only the one we saw
+        # go stale, not a fresh lock another process took in the meantime
+        try:
+            if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout:
+                stale_owner = self._read_lock_owner()
+                if stale_owner is not None:
+                    self._remove_lock_if_owned_by(stale_owner)
+        except OSError:
+            pass
+        owner = f"{os.getpid()}:{os.urandom(8).hex()}"
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        except OSError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(owner)
+        self._lock_owner = owner
+        return True
+
+    def unlock(self) -> None:
+        """Release the lock if this instance still holds it; a lock broken as
+        stale and re-taken by another process is left alone"""
+        owner, self._lock_owner = self._lock_owner, None
+        if owner is not None:
+            self._remove_lock_if_owned_by(owner)
+
+    def _read_lock_owner(self) -> Optional[str]:
+        try:
+            with open(self.lock_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _remove_lock_if_owned_by(self, owner: str) -> None:
+        if self._read_lock_owner() == owner:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
+
+
+# Akool token policy, shared by the API and the standalone scripts so they agree
+# on how long a token in the shared file (settings.akool_token_cache_path) lives
+AKOOL_TOKEN_DEFAULT_TTL = 3600  # used when Akool doesn't report an expiry
+AKOOL_TOKEN_REFRESH_MARGIN = 60  # refresh this many seconds before expiry
+
+
+def akool_token_expiry_from(token_data: Dict[str, Any], now: float) -> float:
+    """Absolute expiry from a getToken response, falling back to a 1-hour TTL"""
+    expires = token_data.get("expires_in") or token_data.get("expire")
+    try:
+        expires = float(expires)
+    except (TypeError, ValueError):
+        return now + AKOOL_TOKEN_DEFAULT_TTL
+    # Large values are absolute epoch timestamps (seconds or milliseconds)
+    if expires > 1e12:
+        expires /= 1000
+    return expires if expires > 1e9 else now + expires
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent async calls that share a key into one execution;
+    callers arriving while it runs await the same result (or exception).
+    A caller that gives up (cancelled, timed out) leaves the call running for
+    the others, but once the last waiter is gone the call itself is cancelled"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        flight.waiters += 1
+        try:
+            # A cancelled caller must not cancel the call the others are waiting on
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to use the result: stop the work and wait for it
+                # to unwind, so callers' concurrency limits still cover it
+                self._forget(key, flight)
+                flight.task.cancel()
+                await asyncio.wait([flight.task])
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    def __len__(self) -> int:
+        return len(self._inflight)
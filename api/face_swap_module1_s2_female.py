@@ -1,12 +1,22 @@
 import os
-import json
 import time
 import asyncio
-from typing import Optional
+import hashlib
+import functools
+from typing import Any, Dict, Optional, Set, Tuple
 
 import httpx
+import orjson
 from dotenv import load_dotenv
 
+# Same token file, lock and expiry policy as the API (api/caching.py), so the two share one cache
+try:
+    from caching import AKOOL_TOKEN_REFRESH_MARGIN, SharedFileValue, TTLCache, akool_token_expiry_from
+    from settings import settings
+except ImportError:
+    from .caching import AKOOL_TOKEN_REFRESH_MARGIN, SharedFileValue, TTLCache, akool_token_expiry_from
+    from .settings import settings
+
 
 # ==========================================
 # Configure here
@@ -28,81 +38,292 @@ AKOOL_CLIENT_ID = os.getenv("AKOOL_CLIENT_ID")
 AKOOL_CLIENT_SECRET = os.getenv("AKOOL_CLIENT_SECRET")
 AKOOL_API_KEY = os.getenv("AKOOL_API_KEY")  # optional direct key
 
+# Token is cached in-process and in a file shared by every worker/process on
+# the host, so restarts and sibling workers reuse it instead of re-authing.
+AKOOL_TOKEN_LOCK_TIMEOUT_SECONDS = 10
+
 _akool_token: Optional[str] = None
 _akool_token_expiry: float = 0
+_akool_token_lock = asyncio.Lock()
+_akool_token_store = SharedFileValue(settings.akool_token_cache_path, lock_timeout=AKOOL_TOKEN_LOCK_TIMEOUT_SECONDS)
 
 
-async def get_akool_token() -> str:
+# ==========================================
+# Shared HTTP client
+# ==========================================
+
+# One pooled client for every Akool call so TCP/TLS connections to
+# openapi.akool.com and sg3.akool.com are reused instead of re-handshaking.
+_client: Optional[httpx.AsyncClient] = None
+
+# HTTP/2 lets concurrent Akool requests share one TLS connection; it needs the
+# optional h2 package (httpx[http2]), so fall back to HTTP/1.1 without it.
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# httpx only decodes brotli when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip"
+
+
+async def init_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Cap in-flight Akool requests to stay under its rate limits, and retry
+# throttled (429) requests after the server-provided Retry-After delay
+# (same AKOOL_MAX_CONCURRENCY setting as the API)
+AKOOL_MAX_RETRIES = 2
+_akool_sem = asyncio.Semaphore(settings.akool_max_concurrency)
+
+
+def _retry_after_seconds(resp: httpx.Response) -> float:
+    try:
+        return max(0.0, float(resp.headers.get("Retry-After", "1")))
+    except ValueError:
+        # HTTP-date form; not worth parsing for a short backoff
+        return 1.0
+
+
+async def _akool_request(client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> httpx.Response:
+    for attempt in range(AKOOL_MAX_RETRIES + 1):
+        async with _akool_sem:
+            resp = await client.request(method, url, **kwargs)
+        if resp.status_code != 429 or attempt == AKOOL_MAX_RETRIES:
+            return resp
+        # Sleep outside the semaphore so throttled calls don't block others
+        await asyncio.sleep(_retry_after_seconds(resp))
+    return resp
+
+
+async def _post_json(
+    client: httpx.AsyncClient,
+    url: str,
+    payload: Dict[str, Any],
+    headers: Optional[Dict[str, str]] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """POST a JSON body serialized with orjson instead of httpx's stdlib encoder."""
+    return await _akool_request(
+        client,
+        "POST",
+        url,
+        content=orjson.dumps(payload),
+        headers={**(headers or {}), "Content-Type": "application/json"},
+        **kwargs,
+    )
+
+
+def invalidate_akool_token() -> None:
+    """Drop the cached token everywhere, e.g. after Akool answers 401."""
     global _akool_token, _akool_token_expiry
-    now = time.time()
-    if _akool_token and now < _akool_token_expiry:
+    _akool_token = None
+    _akool_token_expiry = 0
+    _akool_token_store.clear()
+
+
+def _load_cached_token(now: float) -> Optional[str]:
+    global _akool_token, _akool_token_expiry
+    if _akool_token and now < _akool_token_expiry - AKOOL_TOKEN_REFRESH_MARGIN:
+        return _akool_token
+    shared = _akool_token_store.read()
+    if shared and now < shared[1] - AKOOL_TOKEN_REFRESH_MARGIN:
+        _akool_token, _akool_token_expiry = shared
         return _akool_token
+    return None
+
 
+async def get_akool_token() -> str:
     if AKOOL_API_KEY and not AKOOL_CLIENT_ID:
         # direct key flow
         return AKOOL_API_KEY
 
+    cached = _load_cached_token(time.time())
+    if cached:
+        return cached
+
     if not AKOOL_CLIENT_ID or not AKOOL_CLIENT_SECRET:
         raise RuntimeError("Akool credentials missing. Set AKOOL_CLIENT_ID and AKOOL_CLIENT_SECRET or AKOOL_API_KEY.")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(
-            "https://openapi.akool.com/api/open/v3/getToken",
-            headers={"Content-Type": "application/json"},
-            json={"clientId": AKOOL_CLIENT_ID, "clientSecret": AKOOL_CLIENT_SECRET},
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("code") != 1000:
-            raise RuntimeError(f"Akool token error: {data.get('msg', 'Unknown error')}")
-        _akool_token = data.get("token")
-        _akool_token_expiry = now + 3600 * 24 * 365  # 1 year
-        return _akool_token
+    # Single-flight within the process: concurrent callers queue on the lock
+    # and re-check the cache, so only the first one hits getToken.
+    async with _akool_token_lock:
+        cached = _load_cached_token(time.time())
+        if cached:
+            return cached
+
+        # Single-flight across processes: whoever holds the lock fetches, the rest
+        # wait briefly for the shared cache and only fetch themselves on timeout.
+        lock_deadline = time.monotonic() + AKOOL_TOKEN_LOCK_TIMEOUT_SECONDS
+        while not _akool_token_store.try_lock():
+            if time.monotonic() >= lock_deadline:
+                break
+            await asyncio.sleep(0.2)
+            cached = _load_cached_token(time.time())
+            if cached:
+                return cached
+        try:
+            return await _fetch_akool_token()
+        finally:
+            _akool_token_store.unlock()
+
+
+async def _fetch_akool_token() -> str:
+    global _akool_token, _akool_token_expiry
+    client = await init_client()
+    resp = await _post_json(
+        client,
+        "https://openapi.akool.com/api/open/v3/getToken",
+        {"clientId": AKOOL_CLIENT_ID, "clientSecret": AKOOL_CLIENT_SECRET},
+    )
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    if data.get("code") != 1000:
+        raise RuntimeError(f"Akool token error: {data.get('msg', 'Unknown error')}")
+    _akool_token = data.get("token")
+    _akool_token_expiry = akool_token_expiry_from(data, time.time())
+    _akool_token_store.write(_akool_token, _akool_token_expiry)
+    return _akool_token
 
 
 # ==========================================
 # Face swap util
 # ==========================================
 
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "face_swap_config.json")
+POLL_TIMEOUT_SECONDS = 120
+POLL_MAX_INTERVAL_SECONDS = 10
+
+# Same user image always yields the same landmarks, so detection results are
+# memoized per image URL (keyed by digest) for a day.
+LANDMARKS_CACHE_TTL_SECONDS = 86400
+LANDMARKS_CACHE_MAX_ENTRIES = 1024
+_landmarks_cache = TTLCache(maxsize=LANDMARKS_CACHE_MAX_ENTRIES, ttl=LANDMARKS_CACHE_TTL_SECONDS)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config(config_path: str) -> Dict[str, str]:
+    """Parse face_swap_config.json once and index base image opts by URL."""
+    with open(config_path, "rb") as f:
+        cfg = orjson.loads(f.read())
+    return {img_cfg["url"]: img_cfg.get("opts", "") for img_cfg in cfg.get("base_images", {}).values()}
+
+
+# URL -> opts index built once at import, so the hot path is a single dict probe
+_URL_TO_OPTS: Dict[str, str] = _load_config(CONFIG_PATH)
+
+
 def load_base_image_opts(config_path: str, base_image_url: str) -> str:
-    with open(config_path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
-    for _, img_cfg in cfg.get("base_images", {}).items():
-        if img_cfg.get("url") == base_image_url:
-            opts = img_cfg.get("opts")
-            if not opts:
-                raise RuntimeError("Face opts not configured for base image. Run detect and update config.")
-            return opts
-    raise RuntimeError("Base image not found in face_swap_config.json")
+    index = _URL_TO_OPTS if config_path == CONFIG_PATH else _load_config(config_path)
+    try:
+        opts = index[base_image_url]
+    except KeyError:
+        raise RuntimeError("Base image not found in face_swap_config.json")
+    if not opts:
+        raise RuntimeError("Face opts not configured for base image. Run detect and update config.")
+    return opts
 
 
-async def detect_face_opts(image_url: str) -> str:
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            "https://sg3.akool.com/detect",
-            headers={"Content-Type": "application/json"},
-            json={"image_url": image_url},
-        )
-        resp.raise_for_status()
-        data = resp.json()
-        landmarks = data.get("landmarks_str", "")
-        if not landmarks:
-            raise RuntimeError("No face detected in user image")
-        return landmarks
+@functools.lru_cache(maxsize=LANDMARKS_CACHE_MAX_ENTRIES)
+def _landmarks_cache_key(image_url: str) -> str:
+    # blake2b is faster than sha256 in CPython and 16 bytes is plenty for a cache key
+    return "akool:landmarks:" + hashlib.blake2b(image_url.encode(), digest_size=16).hexdigest()
 
 
-async def face_swap(user_image_url: str, base_image_url: str) -> str:
+async def detect_face_opts(image_url: str) -> str:
+    key = _landmarks_cache_key(image_url)
+    cached = _landmarks_cache.get(key)
+    if cached:
+        return cached
+
+    landmarks = await _detect_face_opts(image_url)
+    _landmarks_cache.set(key, landmarks)
+    return landmarks
+
+
+async def _detect_face_opts(image_url: str) -> str:
+    client = await init_client()
+    resp = await _post_json(client, "https://sg3.akool.com/detect", {"image_url": image_url}, timeout=60.0)
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    landmarks = data.get("landmarks_str", "")
+    if not landmarks:
+        raise RuntimeError("No face detected in user image")
+    return landmarks
+
+
+async def _poll_akool(task_id: str, token: str) -> str:
+    """Poll a submitted face swap until it finishes; callers bound it with wait_for."""
+    client = await init_client()
+    # Exponential backoff: 1s, 2s, 4s, 8s, then every 10s
+    status_url = (
+        "https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage/status?task_id="
+        + task_id
+    )
+    attempt = 0
+    while True:
+        await asyncio.sleep(min(POLL_MAX_INTERVAL_SECONDS, 1 << attempt))
+        attempt += 1
+        status_resp = await _akool_request(client, "GET", status_url, headers={"Authorization": f"Bearer {token}"})
+        if status_resp.status_code == 401:
+            invalidate_akool_token()
+            token = await get_akool_token()
+            continue
+        status_resp.raise_for_status()
+        status_data = orjson.loads(status_resp.content)
+        if status_data.get("code") == 1000:
+            job = status_data.get("data", {})
+            if job.get("status") == "completed":
+                url = job.get("url") or job.get("result_url")
+                if url:
+                    return url
+            elif job.get("status") == "failed":
+                raise RuntimeError("Face swap failed")
+
+
+# Strong references to in-flight poll tasks so they are not garbage collected
+_poll_tasks: Set[asyncio.Task] = set()
+
+
+async def start_face_swap(
+    user_image_url: str, base_image_url: str
+) -> Tuple[Optional[str], Optional["asyncio.Task[str]"]]:
+    """Submit a face swap without waiting for it.
+
+    Returns (result_url, None) when Akool answers synchronously, otherwise
+    (None, task) where task is a background poll resolving to the result URL.
+    """
     if not user_image_url:
         raise ValueError("USER_IMAGE_URL is empty. Please set it at the top of this file.")
 
-    token = await get_akool_token()
-
-    # Load base image opts from local config
-    config_path = os.path.join(os.path.dirname(__file__), "face_swap_config.json")
-    base_opts = load_base_image_opts(config_path, base_image_url)
-
-    # Detect user face opts
-    user_opts = await detect_face_opts(user_image_url)
+    # Base opts are a dict probe; token and face detection are independent network calls
+    base_opts = load_base_image_opts(CONFIG_PATH, base_image_url)
+    token, user_opts = await asyncio.gather(get_akool_token(), detect_face_opts(user_image_url))
 
     payload = {
         "targetImage": [{"path": base_image_url, "opts": base_opts}],  # base
@@ -111,48 +332,53 @@ async def face_swap(user_image_url: str, base_image_url: str) -> str:
         "modifyImage": base_image_url,
     }
 
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        resp = await client.post(
+    client = await init_client()
+    resp = await _post_json(
+        client,
+        "https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage",
+        payload,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=120.0,
+    )
+    if resp.status_code == 401:
+        # Cached token was revoked; drop it and retry once with a fresh one
+        invalidate_akool_token()
+        token = await get_akool_token()
+        resp = await _post_json(
+            client,
             "https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage",
-            headers=headers,
-            json=payload,
+            payload,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=120.0,
         )
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("code") != 1000:
-            raise RuntimeError(f"Akool error: {data.get('msg', 'Unknown error')}")
+    resp.raise_for_status()
+    data = orjson.loads(resp.content)
+    if data.get("code") != 1000:
+        raise RuntimeError(f"Akool error: {data.get('msg', 'Unknown error')}")
 
-        result = data.get("data", {})
-        result_url = result.get("url")
-        task_id = result.get("_id") or result.get("job_id")
+    result = data.get("data", {})
+    result_url = result.get("url")
+    task_id = result.get("_id") or result.get("job_id")
 
-        if result_url:
-            return result_url
+    if result_url:
+        return result_url, None
 
-        if not task_id:
-            raise RuntimeError("Akool returned no url or task id")
+    if not task_id:
+        raise RuntimeError("Akool returned no url or task id")
+
+    task = asyncio.create_task(_poll_akool(task_id, token))
+    _poll_tasks.add(task)
+    task.add_done_callback(_poll_tasks.discard)
+    return None, task
 
-        # Simple polling (every 10s, up to 2 minutes)
-        status_url = (
-            "https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage/status?task_id="
-            + task_id
-        )
-        for _ in range(12):
-            await asyncio.sleep(10)
-            status_resp = await client.get(status_url, headers={"Authorization": f"Bearer {token}"})
-            status_resp.raise_for_status()
-            status_data = status_resp.json()
-            if status_data.get("code") == 1000:
-                job = status_data.get("data", {})
-                if job.get("status") == "completed":
-                    url = job.get("url") or job.get("result_url")
-                    if url:
-                        return url
-                elif job.get("status") == "failed":
-                    raise RuntimeError("Face swap failed")
 
+async def face_swap(user_image_url: str, base_image_url: str) -> str:
+    result_url, task = await start_face_swap(user_image_url, base_image_url)
+    if result_url:
+        return result_url
+    try:
+        return await asyncio.wait_for(task, POLL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
         raise RuntimeError("Face swap timed out while polling")
 
 
@@ -162,6 +388,8 @@ async def main() -> None:
         print("✅ Face swap completed:", url)
     except Exception as e:
         print("❌ Face swap error:", e)
+    finally:
+        await close_client()
 
 
 if __name__ == "__main__":
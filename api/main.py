@@ -3,29 +3,70 @@ import uuid
 import asyncio
 import time
 import re
+import random
+import unicodedata
+import hashlib
+import tempfile
 import warnings
 import logging
+import logging.handlers
+import queue
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 
 # Suppress Vercel's asyncio deprecation warning
 warnings.filterwarnings("ignore", category=DeprecationWarning, message=".*loop argument is deprecated.*")
 
+# Environment is loaded (load_dotenv) and frozen here, before anything reads it
+from .settings import settings
+
+# Startup/diagnostic logging; set LOGGING_LEVEL=WARNING in production to skip
+# the per-service init messages on cold start.
+# Records are queued and formatted/written by a listener thread, so a slow
+# stderr never blocks the event loop
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the message on the calling thread; the queue
+    # is in-process, so hand the record over untouched and let the listener do it
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(message)s"))
+log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+log_listener.start()
+logging.basicConfig(level=settings.logging_level, handlers=[_DeferredQueueHandler(_log_queue)])
+logger = logging.getLogger(__name__)
+
 # Reduce httpx logging noise (set to WARNING to only show actual issues)
 logging.getLogger("httpx").setLevel(logging.WARNING)
 from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.exceptions import RequestValidationError
-from dotenv import load_dotenv
 import boto3
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from urllib.parse import quote
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from io import BytesIO
+import json
+import orjson
+# SIMD-accelerated drop-in for the stdlib codec (audio payloads are base64'd)
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
 import httpx
 
 # Define base models that will always be available (before any import attempts)
+# Request/response models are immutable and drop unknown keys instead of erroring
+_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
 class UserCreate(BaseModel):
+    model_config = _MODEL_CONFIG
+
     name: str
     age: int
     gender: str
@@ -33,6 +74,8 @@ class UserCreate(BaseModel):
     voice_id: Optional[str] = None
 
 class UserUpdate(BaseModel):
+    model_config = _MODEL_CONFIG
+
     name: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[str] = None
@@ -45,6 +88,8 @@ class UserUpdate(BaseModel):
     completed_modules: Optional[List[str]] = None
 
 class UserProgressUpdate(BaseModel):
+    model_config = _MODEL_CONFIG
+
     currentPage: Optional[str] = None
     currentStep: Optional[int] = None
     caricatureUrl: Optional[str] = None
@@ -52,11 +97,15 @@ class UserProgressUpdate(BaseModel):
     completedModules: Optional[List[str]] = None
 
 class QuizAnswerCreate(BaseModel):
+    model_config = _MODEL_CONFIG
+
     user_id: int
     module: str
     answers: Dict[str, Any]
 
 class User(BaseModel):
+    model_config = _MODEL_CONFIG
+
     id: int
     name: str
     age: int
@@ -67,83 +116,238 @@ class User(BaseModel):
     talking_photo_url: Optional[str] = None
     current_page: Optional[str] = None
     current_step: Optional[int] = 0
-    completed_modules: Optional[List[str]] = []
+    completed_modules: Optional[List[str]] = Field(default_factory=list)
 
 class QuizAnswer(BaseModel):
+    model_config = _MODEL_CONFIG
+
     id: int
     user_id: int
     module: str
     answers: Dict[str, Any]
+
+class UploadUrlRequest(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    contentType: str = Field(min_length=1)
+    folder: Literal["user_uploads", "images", "audio", "videos"] = "user_uploads"
+
+class NarrationRequest(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    script: str = ""
+    voiceId: str = Field(min_length=1)
+
+class VoiceDubRequest(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    audioUrl: str = Field(min_length=1)
+    voiceId: str = Field(min_length=1)
+    scenarioType: str = ""
+
+class FaceSwapRequest(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    baseImageUrl: str = Field(min_length=1)
+    userImageUrl: str = Field(min_length=1)
+
+class TalkingPhotoRequest(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    caricatureUrl: str = Field(min_length=1)
+    userName: str = Field(min_length=1)
+    voiceId: str = Field(min_length=1)
+    audioScript: str = ""  # Custom audio script for scenarios
+    scenarioType: str = "default"  # For different sample videos
+    extendedTimeout: bool = False  # For pre-generation with longer timeout
+
+# Akool API envelope ({"code": 1000, "msg": ..., "data": {...}}), shared by the
+# face-swap and talking-photo create/status endpoints. Parsed straight from the
+# response bytes by pydantic-core; fields a given endpoint doesn't send stay None
+AKOOL_SUCCESS_CODE = 1000
+
+class AkoolData(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    id: Optional[str] = Field(default=None, alias="_id")
+    job_id: Optional[str] = None
+    video_id: Optional[str] = None
+    url: Optional[str] = None
+    result_url: Optional[str] = None
+    status: Optional[Any] = None  # Face swap job status ("completed", "failed", ...)
+    video_status: Optional[int] = None  # Talking photo: 1 queueing, 2 processing, 3 completed, 4 failed
+    video: Optional[str] = None
+    error_msg: Optional[str] = None
+
+class AkoolResponse(BaseModel):
+    model_config = _MODEL_CONFIG
+
+    code: Optional[int] = None
+    msg: Optional[str] = None
+    data: Optional[AkoolData] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.code == AKOOL_SUCCESS_CODE
+
 # Initialize Supabase service
 try:
     from .supabase_service import SupabaseService
-    print("✅ Supabase service module imported successfully")
+    logger.info("✅ Supabase service module imported successfully")
     
     # Initialize Supabase service
-    print("🔄 Initializing Supabase service...")
-    print(f"   SUPABASE_URL: {os.getenv('SUPABASE_URL', 'NOT_SET')}")
-    print(f"   SUPABASE_KEY: {'SET' if os.getenv('SUPABASE_KEY') else 'NOT_SET'}")
+    logger.info("🔄 Initializing Supabase service...")
+    logger.info("   SUPABASE_URL: %s", settings.supabase_url or 'NOT_SET')
+    logger.info("   SUPABASE_KEY: %s", 'SET' if settings.supabase_key else 'NOT_SET')
     
     # Only initialize if we have both URL and key
-    if os.getenv('SUPABASE_URL') and os.getenv('SUPABASE_KEY'):
+    if settings.supabase_url and settings.supabase_key:
         supabase_service = SupabaseService()
-        print("✅ Supabase service initialized successfully")
+        logger.info("✅ Supabase service initialized successfully")
         supabase_available = True
     else:
-        print("⚠️ Skipping Supabase initialization - missing credentials")
+        logger.warning("⚠️ Skipping Supabase initialization - missing credentials")
         supabase_service = None
         supabase_available = False
 except Exception as e:
-    print(f"⚠️ Warning: Supabase service failed to initialize: {e}")
+    logger.warning("⚠️ Warning: Supabase service failed to initialize: %s", e)
     supabase_service = None
     supabase_available = False
-from io import BytesIO
-import base64
-import json
-import httpx
 
-# Load environment variables first
-load_dotenv()
+from .caching import (
+    TTLCache, SharedFileValue, SingleFlight,
+    AKOOL_TOKEN_REFRESH_MARGIN, akool_token_expiry_from,
+)
+from .middleware import CORSAndErrorASGI, ProfilingASGI
 
 # AI Service SDKs
 try:
     from elevenlabs.client import ElevenLabs
     elevenlabs_import_available = True
 except ImportError as e:
-    print(f"⚠️ ElevenLabs import failed: {e}")
+    logger.warning("⚠️ ElevenLabs import failed: %s", e)
     ElevenLabs = None
     elevenlabs_import_available = False
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
     openai_import_available = True
 except ImportError as e:
-    print(f"⚠️ OpenAI import failed: {e}")
-    OpenAI = None
+    logger.warning("⚠️ OpenAI import failed: %s", e)
+    AsyncOpenAI = None
     openai_import_available = False
 
 try:
-    from .s3_service import s3_service
+    from .s3_service import s3_service, IteratorReader, TRANSFER_CONFIG, IMMUTABLE_CACHE_CONTROL, S3_CLIENT_CONFIG
     s3_service_available = True
 except ImportError as e:
-    print(f"⚠️ S3 service import failed: {e}")
+    logger.warning("⚠️ S3 service import failed: %s", e)
     s3_service = None
+    IteratorReader = TRANSFER_CONFIG = S3_CLIENT_CONFIG = None
+    IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
     s3_service_available = False
 
-# Environment variables
-S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-AWS_REGION = os.getenv("AWS_REGION")
-CLOUDFRONT_DOMAIN = os.getenv("CLOUDFRONT_DOMAIN", "d3srmxrzq4dz1v.cloudfront.net")  # CDN domain
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-print(f"🔍 ElevenLabs API Key loaded: {'Yes' if ELEVENLABS_API_KEY else 'No'}")
-if ELEVENLABS_API_KEY:
-    print(f"🔍 API Key starts with: {ELEVENLABS_API_KEY[:10]}...")
-AKOOL_CLIENT_ID = os.getenv("AKOOL_CLIENT_ID")
-AKOOL_CLIENT_SECRET = os.getenv("AKOOL_CLIENT_SECRET")
-AKOOL_API_KEY = os.getenv("AKOOL_API_KEY")  # Keep for backward compatibility
+# Environment variables (aliases of the frozen settings used throughout this module)
+S3_BUCKET_NAME = settings.s3_bucket_name
+AWS_ACCESS_KEY_ID = settings.aws_access_key_id
+AWS_SECRET_ACCESS_KEY = settings.aws_secret_access_key
+AWS_REGION = settings.aws_region
+CLOUDFRONT_DOMAIN = settings.cloudfront_domain  # CDN domain
+OPENAI_API_KEY = settings.openai_api_key
+ELEVENLABS_API_KEY = settings.elevenlabs_api_key
+logger.info("🔍 ElevenLabs API Key loaded: %s", 'Yes' if ELEVENLABS_API_KEY else 'No')
+
+# Public objects are served straight from CloudFront, so a CDN URL is just the
+# key appended to a prefix built once here
+CDN_BASE_URL = f"https://{CLOUDFRONT_DOMAIN}/"
+
+def cdn_object_url(key: str) -> str:
+    return CDN_BASE_URL + key
+
+# Talking-photo fallbacks shown when Akool fails or times out, per scenario
+SAMPLE_VIDEO_URLS = {
+    "lottery": cdn_object_url("video-url/scenario1_sample.mp4"),
+    "criminal": cdn_object_url("video-url/scenario1_sample.mp4"),
+    "accident_call": cdn_object_url("video-url/scenario2_sample.mp4"),
+    "default": cdn_object_url("sample/talking_photo_sample.mp4")
+}
+SAMPLE_VIDEO_MESSAGE = "서버 과부하로 인해 샘플 영상을 보여드립니다"
+
+def akool_video_fallback_url(akool_video_url: str) -> str:
+    """URL to hand out when copying an Akool video to S3 fails. With
+    AKOOL_CDN_PROXY_PREFIX set, the same path is served through our CloudFront
+    (a behavior on that prefix with Akool's CDN as origin) so repeat views are
+    edge hits; otherwise the Akool URL itself"""
+    if not settings.akool_cdn_proxy_prefix:
+        return akool_video_url
+    parts = urlsplit(akool_video_url)
+    key = f"{settings.akool_cdn_proxy_prefix}{parts.path}"
+    return cdn_object_url(f"{key}?{parts.query}" if parts.query else key)
+
+def sample_video_response(scenario_type: str) -> dict:
+    return {
+        "videoUrl": SAMPLE_VIDEO_URLS.get(scenario_type, SAMPLE_VIDEO_URLS["default"]),
+        "message": SAMPLE_VIDEO_MESSAGE,
+        "isSample": True
+    }
+SCENARIO_GENERATION_CONCURRENCY = 4  # Max concurrent Akool/ElevenLabs jobs per scenario batch
+
+# Process-wide caps on in-flight upstream calls, so a burst of users queues here
+# instead of getting throttled by Akool/ElevenLabs and falling back to samples.
+# Held only for the request itself, never across a polling sleep
+akool_semaphore = asyncio.Semaphore(settings.akool_max_concurrency)
+elevenlabs_semaphore = asyncio.Semaphore(settings.elevenlabs_max_concurrency)
+
+# Process-wide caps on whole background pre-generation pipelines (submit plus
+# minutes of polling, fallbacks and saves), so many users onboarding at once
+# queue for a slot instead of all holding Akool/ElevenLabs jobs open. A timed-out
+# job is cancelled (see SingleFlight) before its slot is released, and the
+# wait_for timeouts start once a slot is acquired
+faceswap_pipeline_semaphore = asyncio.Semaphore(8)
+talking_photo_pipeline_semaphore = asyncio.Semaphore(4)
+voice_dub_pipeline_semaphore = asyncio.Semaphore(8)
+
+# Pre-generated scenario content. Only the face-swap base image depends on the
+# user (by gender), so the per-gender configs are built once at import
+SCENARIO_SCRIPTS = {
+    'lottery': '1등 당첨돼서 정말 기뻐요! 감사합니다!',
+    'crime': '제가 한 거 아니에요... 찍지 마세요. 죄송합니다…'
+}
+VOICE_DUB_SOURCES = {
+    'investment_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice1.mp3',
+    'accident_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice2.mp3'
+}
+
+def _build_scenarios(gender: str) -> dict:
+    return {
+        'lottery': {
+            'base_image': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case1-{gender}.png',
+            'script': SCENARIO_SCRIPTS['lottery']
+        },
+        'crime': {
+            'base_image': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case2-{gender}.png',
+            'script': SCENARIO_SCRIPTS['crime']
+        }
+    }
+
+SCENARIOS_BY_GENDER = {gender: _build_scenarios(gender) for gender in ('male', 'female')}
+
+def scenarios_for_gender(gender: str) -> dict:
+    gender = gender.lower()
+    return SCENARIOS_BY_GENDER.get(gender) or _build_scenarios(gender)
+
+# ElevenLabs model for talking-photo speech; part of the audio's S3 key
+TALKING_PHOTO_TTS_MODEL = "eleven_multilingual_v2"
+
+# Face swap base images are static per deploy: load the config once and index
+# it by URL so each faceswap request is a single dict lookup
+try:
+    with open(os.path.join(os.path.dirname(__file__), "face_swap_config.json"), 'r', encoding='utf-8') as f:
+        _FACE_SWAP_CONFIG = json.load(f)
+except (OSError, ValueError) as e:
+    logger.warning("⚠️ Could not load face_swap_config.json: %s", e)
+    _FACE_SWAP_CONFIG = {"base_images": {}}
+_BASE_IMAGE_BY_URL = {cfg["url"]: cfg for cfg in _FACE_SWAP_CONFIG["base_images"].values()}
 
 
 # Initialize Supabase tables on startup
@@ -152,11 +356,70 @@ AKOOL_API_KEY = os.getenv("AKOOL_API_KEY")  # Keep for backward compatibility
 app = FastAPI(
     title="AI Awareness Backend API",
     description="Backend API for AI awareness education platform",
-    version="1.0.0"
+    version="1.0.0",
+    # Serialize every route's response with orjson instead of stdlib json
+    default_response_class=ORJSONResponse
 )
 
-# Progress tracking storage
-progress_tracking: Dict[str, Dict[str, Any]] = {}
+# Progress tracking storage, bounded so abandoned task ids expire after an hour
+# instead of accumulating for the life of the process
+progress_tracking = TTLCache(maxsize=10_000, ttl=3600)
+
+def set_progress(task_id: str, progress: int, message: str, completed: bool = False, **extra: Any) -> None:
+    """Replace a task's progress entry. Writing a new dict (rather than mutating
+    the cached one) refreshes its TTL/LRU position and can't KeyError if the
+    entry already expired"""
+    progress_tracking[task_id] = {
+        "progress": progress,
+        "message": message,
+        "completed": completed,
+        "timestamp": time.time(),
+        **extra
+    }
+
+# Asynchronous jobs submitted via POST /api/jobs/{job_type}, polled via
+# GET /api/jobs/{job_id}. Running jobs live in running_jobs (never evicted, at
+# most MAX_RUNNING_JOBS, since each spends Akool/ElevenLabs credits); finished
+# ones move to the jobs cache for an hour, keeping only their result URLs
+MAX_RUNNING_JOBS = 20
+JOB_RESULT_FIELDS = ("resultUrl", "videoUrl", "audioUrl", "isSample")
+running_jobs: Dict[str, dict] = {}
+jobs = TTLCache(maxsize=10_000, ttl=3600)
+
+# Recently generated narration audio keyed by (voice_id, script digest), so a
+# repeated narration request skips the ElevenLabs round-trip entirely
+narration_cache = TTLCache(maxsize=64, ttl=300)
+
+# Akool face landmarks (detect API "landmarks_str") keyed by user image URL.
+# Each scenario face-swaps the same user photo several times, and the users
+# table has no face_opts column, so this saves a detect round-trip per swap
+face_opts_cache = TTLCache(maxsize=10_000, ttl=86400)
+
+# OpenAI vision descriptions keyed by image URL. Uploaded photos get a fresh
+# UUID key, so a URL always names the same bytes and a retry (e.g. regenerating
+# the caricature) skips the 1-4 s vision call
+face_analysis_cache = TTLCache(maxsize=1_000, ttl=86400)
+
+# Identical face-swap / talking-photo requests that overlap in time share one
+# Akool pipeline instead of each paying for their own
+faceswap_flight = SingleFlight()
+talking_photo_flight = SingleFlight()
+
+# /api/scenario-status responses keyed by user ID. The frontend polls every few
+# seconds until generation finishes; a short TTL absorbs most of those polls and
+# update_user_row drops the entry whenever this process writes the status columns
+scenario_status_cache = TTLCache(maxsize=10_000, ttl=2.0)
+SCENARIO_STATUS_TERMINAL_TTL = 60.0
+SCENARIO_STATUS_TERMINAL = frozenset({"completed", "partial_success", "failed"})
+
+# Browser-side caching for the polled status endpoints: always revalidated
+# (no-cache), so an unchanged status costs a 304 and a reset/regenerated one is
+# seen on the next poll
+STATUS_CACHE_CONTROL = "private, no-cache"
+
+# Overlapping analyze-face calls for one image URL (double-clicks, retries
+# racing the first attempt) share a single OpenAI vision call
+face_analysis_flight = SingleFlight()
 
 # CORS configuration
 origins = [
@@ -169,65 +432,32 @@ origins = [
     "https://ai-frontend-4mxmgszte-hanaisreals-projects.vercel.app",
 ]
 
+# Opt-in request profiling: with PROFILING=1 and PROFILING_TOKEN set, a request
+# carrying ?profile=1&profile_token=<token> returns a pyinstrument HTML report.
+# Added first so it sits innermost and only times the route itself
+if settings.profiling and settings.profiling_token:
+    try:
+        from pyinstrument import Profiler
+        app.add_middleware(ProfilingASGI, token=settings.profiling_token, profiler_cls=Profiler)
+        logger.info("✅ Request profiling enabled (?profile=1)")
+    except ImportError:
+        logger.warning("⚠️ PROFILING=1 but pyinstrument is not installed; profiling disabled")
+
+# CORS headers, preflight responses and unhandled-error JSON are all produced
+# by one pure ASGI middleware (see middleware.py)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    CORSAndErrorASGI,
+    allowed_origins=frozenset(origin.encode("latin-1") for origin in origins),
 )
 
-# Global exception handler to ensure CORS headers are always included
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    origin = request.headers.get('origin')
-    if origin in origins:
-        return JSONResponse(
-            status_code=500,
-            content={"detail": f"Internal server error: {str(exc)}"},
-            headers={
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Credentials": "true",
-            }
-        )
-    return JSONResponse(
-        status_code=500,
-        content={"detail": f"Internal server error: {str(exc)}"},
-    )
-
-@app.exception_handler(HTTPException)
-async def http_exception_handler(request: Request, exc: HTTPException):
-    origin = request.headers.get('origin')
-    if origin in origins:
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={"detail": exc.detail},
-            headers={
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Credentials": "true",
-            }
-        )
-    return JSONResponse(
-        status_code=exc.status_code,
-        content={"detail": exc.detail},
-    )
-
-# Add OPTIONS handler for preflight requests
-@app.options("/{full_path:path}")
-async def options_handler(request: Request, full_path: str):
-    origin = request.headers.get('origin')
-    if origin in origins:
-        return JSONResponse(
-            content={},
-            headers={
-                "Access-Control-Allow-Origin": origin,
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization",
-                "Access-Control-Allow-Credentials": "true",
-                "Access-Control-Max-Age": "86400",
-            }
-        )
-    return JSONResponse(content={"detail": "Forbidden"}, status_code=403)
+# Compress JSON bodies of 1 KB or more (small responses aren't worth the CPU).
+# MP3 narrations/voice dubs and other already-compressed media are passed
+# through untouched: gzip saves nothing on them and buffers streamed audio.
+GZIP_EXCLUDED_CONTENT_TYPES = (
+    "audio/*", "video/*", "image/*", "text/event-stream",
+    "application/zip", "application/gzip", "application/x-gzip",
+)
+app.add_middleware(GZipMiddleware, minimum_size=1024, exclude_content_types=GZIP_EXCLUDED_CONTENT_TYPES)
 
 # S3 Client Initialization and CORS Configuration
 s3_client = None
@@ -237,16 +467,17 @@ try:
             's3',
             aws_access_key_id=AWS_ACCESS_KEY_ID,
             aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
+            region_name=AWS_REGION,
+            config=S3_CLIENT_CONFIG
         )
-        print("✅ S3 client initialized successfully.")
+        logger.info("✅ S3 client initialized successfully.")
         
         # Skip CORS setup to avoid crashes
-        print("⚠️ S3 CORS setup skipped to prevent startup issues")
+        logger.info("⚠️ S3 CORS setup skipped to prevent startup issues")
     else:
-        print("⚠️ S3 client not initialized - missing AWS credentials")
+        logger.warning("⚠️ S3 client not initialized - missing AWS credentials")
 except Exception as e:
-    print(f"⚠️ Warning: S3 initialization failed: {e}")
+    logger.warning("⚠️ Warning: S3 initialization failed: %s", e)
     s3_client = None
 
 # ElevenLabs Client Initialization
@@ -254,83 +485,332 @@ elevenlabs_client = None
 if elevenlabs_import_available and ELEVENLABS_API_KEY:
     try:
         elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
-        print("✅ ElevenLabs client initialized successfully.")
+        logger.info("✅ ElevenLabs client initialized successfully.")
     except Exception as e:
-        print(f"⚠️ Error initializing ElevenLabs client: {e}")
+        logger.warning("⚠️ Error initializing ElevenLabs client: %s", e)
 else:
-    print("⚠️ ElevenLabs client not initialized (import failed or missing API key)")
+    logger.warning("⚠️ ElevenLabs client not initialized (import failed or missing API key)")
 
-# OpenAI Client Initialization
+# OpenAI Client Initialization (async client, so vision and DALL-E calls
+# don't block the event loop for their 1-20 s)
 openai_client = None
 if openai_import_available and OPENAI_API_KEY:
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
-        print("✅ OpenAI client initialized successfully.")
+        openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        logger.info("✅ OpenAI client initialized successfully.")
     except Exception as e:
-        print(f"⚠️ Error initializing OpenAI client: {e}")
+        logger.warning("⚠️ Error initializing OpenAI client: %s", e)
 else:
-    print("⚠️ OpenAI client not initialized (import failed or missing API key)")
+    logger.warning("⚠️ OpenAI client not initialized (import failed or missing API key)")
+
+# Shared outbound HTTP client: one keep-alive pool (HTTP/2 when the h2 package
+# is installed) reused across requests instead of a TCP+TLS handshake per call
+try:
+    import h2  # noqa: F401
+    http2_available = True
+except ImportError:
+    http2_available = False
+
+http_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide AsyncClient, creating it on first use"""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=http2_available,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30.0)
+        )
+    return http_client
+
+@app.on_event("shutdown")
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+# Fire-and-forget generation jobs, keyed by (job kind, user_id). Holding the
+# task here keeps a strong reference (the loop only keeps a weak one) and lets
+# a repeated trigger for the same user join the running job instead of
+# starting a duplicate that burns Akool/ElevenLabs credits
+background_jobs: Dict[tuple, asyncio.Task] = {}
+
+def start_background_job(key: tuple, coro) -> bool:
+    """Schedule coro unless a job with the same key is still running.
+    Returns True if a new job was started"""
+    running = background_jobs.get(key)
+    if running is not None and not running.done():
+        coro.close()
+        return False
+    
+    task = asyncio.create_task(coro)
+    background_jobs[key] = task
+    
+    def _on_done(finished: asyncio.Task):
+        if background_jobs.get(key) is finished:
+            del background_jobs[key]
+        if not finished.cancelled() and finished.exception():
+            logger.warning("❌ Background job %s failed: %s", key, finished.exception(), exc_info=finished.exception())
+    
+    task.add_done_callback(_on_done)
+    return True
+
+@app.on_event("shutdown")
+async def cancel_background_jobs():
+    for task in list(background_jobs.values()):
+        task.cancel()
+
+@app.on_event("shutdown")
+def stop_log_listener():
+    # Flushes any queued records before the process exits
+    log_listener.stop()
 
 # Akool Token Management
+# The token is cached per process and in a file shared by all workers on the
+# host, so only one worker authenticates per expiry window. Failures are
+# cached briefly so a broken credential doesn't stampede /getToken.
+AKOOL_TOKEN_ERROR_TTL = 5
 akool_token = None
 akool_token_expiry = 0
+akool_token_error = None
+akool_token_error_expiry = 0
+akool_token_store = SharedFileValue(settings.akool_token_cache_path)
+# Single-flight within the process: concurrent requests that find the token
+# expired wait for one refresh instead of each hitting the file lock / getToken
+akool_token_lock = asyncio.Lock()
+
+def _cached_akool_token() -> Optional[str]:
+    if akool_token and time.time() < akool_token_expiry - AKOOL_TOKEN_REFRESH_MARGIN:
+        return akool_token
+    return None
 
 async def get_akool_token():
     """Get or refresh Akool API token"""
-    global akool_token, akool_token_expiry
-    
     # Check if we have a valid token
-    current_time = time.time()
-    if akool_token and current_time < akool_token_expiry:
-        return akool_token
+    token = _cached_akool_token()
+    if token:
+        return token
     
     # If we have a direct API key, use it
-    if AKOOL_API_KEY and not AKOOL_CLIENT_ID:
-        print("Using direct AKOOL_API_KEY for authentication")
-        return AKOOL_API_KEY
+    if settings.akool_api_key and not settings.akool_client_id:
+        logger.debug("Using direct AKOOL_API_KEY for authentication")
+        return settings.akool_api_key
     
     # Generate new token using clientId/clientSecret
-    if not AKOOL_CLIENT_ID or not AKOOL_CLIENT_SECRET:
+    if not settings.akool_client_id or not settings.akool_client_secret:
         raise HTTPException(status_code=500, detail="Akool credentials not configured. Need AKOOL_CLIENT_ID and AKOOL_CLIENT_SECRET.")
     
-    try:
-        print(f"🔑 Getting new Akool token with clientId: {AKOOL_CLIENT_ID[:10]}...")
-        import httpx
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            token_response = await client.post(
-                "https://openapi.akool.com/api/open/v3/getToken",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "clientId": AKOOL_CLIENT_ID,
-                    "clientSecret": AKOOL_CLIENT_SECRET
-                }
-            )
-            
-            if token_response.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"Failed to get Akool token: {token_response.status_code}")
-            
-            token_data = token_response.json()
-            if token_data.get("code") != 1000:
-                raise HTTPException(status_code=500, detail=f"Akool token error: {token_data.get('msg', 'Unknown error')}")
-            
-            akool_token = token_data.get("token")
-            akool_token_expiry = current_time + (365 * 24 * 60 * 60)  # 1 year from now
-            
-            print(f"✅ Got new Akool token: {akool_token[:20]}...")
+    async with akool_token_lock:
+        # Another request may have refreshed it while we waited for the lock
+        token = _cached_akool_token()
+        if token:
+            return token
+        return await _refresh_akool_token()
+
+async def _refresh_akool_token() -> str:
+    """Fetch a token from the shared file or Akool; caller holds akool_token_lock"""
+    global akool_token, akool_token_expiry, akool_token_error, akool_token_error_expiry
+    
+    current_time = time.time()
+    if akool_token_error and current_time < akool_token_error_expiry:
+        raise HTTPException(status_code=500, detail=akool_token_error)
+    
+    # Another worker may already have refreshed it
+    shared = akool_token_store.read()
+    if shared and shared[1] - AKOOL_TOKEN_REFRESH_MARGIN > current_time:
+        akool_token, akool_token_expiry = shared
+        return akool_token
+    
+    # Only the worker holding the lock calls /getToken; the others poll the shared file
+    lock_deadline = time.monotonic() + akool_token_store.lock_timeout
+    while not akool_token_store.try_lock():
+        if time.monotonic() >= lock_deadline:
+            break
+        await asyncio.sleep(0.2)
+        shared = akool_token_store.read()
+        if shared and shared[1] - AKOOL_TOKEN_REFRESH_MARGIN > time.time():
+            akool_token, akool_token_expiry = shared
             return akool_token
+    
+    try:
+        logger.info("🔑 Requesting a new Akool token")
+        
+        token_response = await get_http_client().post(
+            "https://openapi.akool.com/api/open/v3/getToken",
+            headers={"Content-Type": "application/json"},
+            json={
+                "clientId": settings.akool_client_id,
+                "clientSecret": settings.akool_client_secret
+            }
+        )
+        
+        if token_response.status_code != 200:
+            raise HTTPException(status_code=500, detail=f"Failed to get Akool token: {token_response.status_code}")
+        
+        token_data = orjson.loads(token_response.content)
+        if token_data.get("code") != 1000:
+            raise HTTPException(status_code=500, detail=f"Akool token error: {token_data.get('msg', 'Unknown error')}")
+        
+        akool_token = token_data.get("token")
+        akool_token_expiry = akool_token_expiry_from(token_data, current_time)
+        akool_token_store.write(akool_token, akool_token_expiry)
+        
+        logger.info("✅ Got new Akool token, valid for %.0fs", akool_token_expiry - current_time)
+        return akool_token
             
     except Exception as e:
-        print(f"❌ Error getting Akool token: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to authenticate with Akool: {str(e)}")
+        logger.error("❌ Error getting Akool token: %s", e)
+        akool_token_error = f"Failed to authenticate with Akool: {str(e)}"
+        akool_token_error_expiry = time.time() + AKOOL_TOKEN_ERROR_TTL
+        raise HTTPException(status_code=500, detail=akool_token_error)
+    finally:
+        akool_token_store.unlock()
+
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9 _-]")
+
+def _safe_user_name(user_name: str) -> str:
+    """ASCII-safe, S3-key-friendly form of a user name (max 20 chars, spaces as
+    underscores); Korean or other non-ASCII names that leave nothing behind
+    become "user"."""
+    if not user_name:
+        return "user"
+    ascii_name = unicodedata.normalize('NFKD', user_name).encode('ascii', 'ignore').decode('ascii')
+    return _UNSAFE_NAME_CHARS.sub("", ascii_name).strip().replace(' ', '_')[:20] or "user"
+
+class PollBackoff:
+    """Async iterator for polling external jobs: sleeps min_s * rate**n seconds
+    (capped at max_s, +/-20% jitter) before each attempt and stops once
+    deadline_s has elapsed. Call reset() after a transient error to poll
+    quickly again once the service recovers, and honor_retry_after() with
+    each response so a server-provided Retry-After replaces the next delay."""
+    
+    def __init__(self, *, min_s: float = 1.0, max_s: float = 30.0, rate: float = 1.5, deadline_s: float):
+        self.min_s = min_s
+        self.max_s = max_s
+        self.rate = rate
+        self.deadline = time.monotonic() + deadline_s
+        self.index = 0
+        self.attempt = 0
+        self.retry_after: Optional[float] = None
+    
+    def reset(self) -> None:
+        self.index = 0
+    
+    def honor_retry_after(self, response: httpx.Response) -> None:
+        """Use the response's Retry-After (delta-seconds or HTTP date), if any, as the next delay"""
+        value = response.headers.get("retry-after")
+        if not value:
+            return
+        try:
+            self.retry_after = max(0.0, float(value))
+        except ValueError:
+            try:
+                self.retry_after = max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> int:
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise StopAsyncIteration
+        if self.retry_after is not None:
+            delay, self.retry_after = self.retry_after, None
+        else:
+            delay = min(self.max_s, self.min_s * self.rate ** self.index) * random.uniform(0.8, 1.2)
+            self.index += 1
+        await asyncio.sleep(min(delay, remaining))
+        self.attempt += 1
+        return self.attempt
 
 # Helper function for S3 upload (using consolidated S3 service)
 async def upload_to_s3(file: UploadFile, bucket_name: str, object_name: Optional[str] = None) -> str:
-    file_data = await file.read()
     filename = object_name.split('/')[-1] if object_name else None
     folder = object_name.split('/')[0] if object_name and '/' in object_name else 'user_uploads'
     
-    return s3_service.upload_file(file_data, file.content_type, folder, filename)
+    # Stream the spooled upload straight to S3 in a worker thread instead of
+    # reading the whole body into memory on the event loop
+    await file.seek(0)
+    return await asyncio.to_thread(s3_service.upload_fileobj, file.file, file.content_type, folder, filename)
+
+# Remote files are mirrored into S3 in 8 MB multipart parts, at most 4 uploading
+# at once; anything smaller than one part goes up as a single put_object
+MIRROR_PART_SIZE = 8 * 1024 * 1024
+MIRROR_MAX_PARTS_IN_FLIGHT = 4
+MIRROR_TIMEOUT_SECONDS = 180  # Whole download + upload, not per request
+
+async def mirror_url_to_s3(source_url: str, object_name: str, extra_args: dict) -> None:
+    """Stream source_url into S3 at object_name while it downloads, so the upload
+    overlaps the download and memory is bounded by the parts in flight instead
+    of the whole file. extra_args are put_object parameters (ACL, ContentType, ...)"""
+    upload_id = None
+    part_tasks = []
+    in_flight = asyncio.Semaphore(MIRROR_MAX_PARTS_IN_FLIGHT)
+    buffer = bytearray()
+    
+    async def upload_part(part_number: int, body: bytearray) -> dict:
+        try:
+            response = await asyncio.to_thread(
+                s3_client.upload_part,
+                Bucket=S3_BUCKET_NAME, Key=object_name, UploadId=upload_id,
+                PartNumber=part_number, Body=body
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
+        finally:
+            in_flight.release()
+    
+    async def submit_part(body: bytearray) -> None:
+        nonlocal upload_id
+        if upload_id is None:
+            created = await asyncio.to_thread(
+                s3_client.create_multipart_upload, Bucket=S3_BUCKET_NAME, Key=object_name, **extra_args
+            )
+            upload_id = created["UploadId"]
+        # Waiting here pauses the download while the maximum number of parts upload
+        await in_flight.acquire()
+        part_tasks.append(asyncio.create_task(upload_part(len(part_tasks) + 1, body)))
+    
+    try:
+        async with get_http_client().stream("GET", source_url, follow_redirects=True, timeout=120.0) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                buffer += chunk
+                while len(buffer) >= MIRROR_PART_SIZE:
+                    # Slicing a bytearray already copies; botocore takes it as-is
+                    await submit_part(buffer[:MIRROR_PART_SIZE])
+                    del buffer[:MIRROR_PART_SIZE]
+        
+        if upload_id is None:
+            await asyncio.to_thread(
+                s3_client.put_object, Bucket=S3_BUCKET_NAME, Key=object_name, Body=buffer, **extra_args
+            )
+            return
+        
+        if buffer:
+            # Last part: nothing touches the buffer after this, so hand it over uncopied
+            await submit_part(buffer)
+        parts = await asyncio.gather(*part_tasks)
+        await asyncio.to_thread(
+            s3_client.complete_multipart_upload,
+            Bucket=S3_BUCKET_NAME, Key=object_name, UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+    except BaseException:
+        for task in part_tasks:
+            task.cancel()
+        await asyncio.gather(*part_tasks, return_exceptions=True)
+        if upload_id is not None:
+            try:
+                await asyncio.to_thread(
+                    s3_client.abort_multipart_upload, Bucket=S3_BUCKET_NAME, Key=object_name, UploadId=upload_id
+                )
+            except Exception as abort_error:
+                logger.warning("⚠️ Could not abort multipart upload %s: %s", object_name, abort_error)
+        raise
 
 @app.get("/")
 async def read_root():
@@ -358,6 +838,8 @@ async def test_endpoint():
 @app.get("/api/health")
 async def health_check():
     """Comprehensive health check for all services"""
+    # The Supabase probe is a blocking network call; keep it off the event loop
+    supabase_ok = await asyncio.to_thread(supabase_service.health_check) if supabase_available and supabase_service else False
     return {
         "status": "healthy",
         "timestamp": time.time(),
@@ -365,7 +847,7 @@ async def health_check():
             "s3": s3_client is not None,
             "elevenlabs": elevenlabs_client is not None,
             "openai": openai_client is not None,
-            "supabase": supabase_service.health_check() if supabase_available and supabase_service else False
+            "supabase": supabase_ok
         },
         "database": "supabase",
         "version": "2.0.0"
@@ -469,19 +951,15 @@ async def test_voice_clone():
 @app.get("/api/progress/{task_id}")
 async def get_progress(task_id: str):
     """Get progress for a specific task"""
-    if task_id not in progress_tracking:
+    progress = progress_tracking.get(task_id)
+    if progress is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return progress_tracking[task_id]
+    return progress
 
 @app.post("/api/progress/{task_id}")
 async def update_progress(task_id: str, progress: int, message: str = "", completed: bool = False):
     """Update progress for a specific task"""
-    progress_tracking[task_id] = {
-        "progress": progress,
-        "message": message,
-        "completed": completed,
-        "timestamp": time.time()
-    }
+    set_progress(task_id, progress, message, completed)
     return {"success": True}
 
 @app.get("/api/akool-token-test")
@@ -492,22 +970,23 @@ async def test_akool_token():
         return {
             "success": True,
             "token_preview": f"{token[:20]}..." if token else None,
-            "auth_method": "client_credentials" if AKOOL_CLIENT_ID else "direct_token"
+            "auth_method": "client_credentials" if settings.akool_client_id else "direct_token"
         }
     except Exception as e:
         return {
             "success": False,
             "error": str(e),
-            "auth_method": "client_credentials" if AKOOL_CLIENT_ID else "direct_token"
+            "auth_method": "client_credentials" if settings.akool_client_id else "direct_token"
         }
 
 
 @app.get("/api/users/{user_id}")
-def read_user(user_id: int):
+async def read_user(user_id: int):
     """Get user by ID from Supabase"""
     if not supabase_available or not supabase_service:
         raise HTTPException(status_code=503, detail="Database service unavailable")
-    user = supabase_service.get_user(user_id)
+    # supabase-py is sync-only; run the query in a worker thread to keep the loop free
+    user = await asyncio.to_thread(supabase_service.get_user, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -519,7 +998,7 @@ async def trigger_scenario_generation_manual(user_id: int):
         if not supabase_available or not supabase_service:
             raise HTTPException(status_code=503, detail="Database service unavailable")
         
-        user = supabase_service.get_user(user_id)
+        user = await asyncio.to_thread(supabase_service.get_user, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -530,8 +1009,22 @@ async def trigger_scenario_generation_manual(user_id: int):
         if not user_image_url or not voice_id or not gender:
             raise HTTPException(status_code=400, detail="User missing required data (image_url, voice_id, gender)")
         
+        if not await claim_scenario_generation(user_id):
+            return {
+                "message": f"Scenario generation already in progress for user {user_id}",
+                "status": "already_in_progress"
+            }
+        
         # Start scenario generation in background
-        asyncio.create_task(generate_scenario_content_simple(user_id, user_image_url, voice_id, gender))
+        started = start_background_job(
+            ("scenarios", user_id),
+            generate_scenario_content_simple(user_id, user_image_url, voice_id, gender)
+        )
+        if not started:
+            return {
+                "message": f"Scenario generation already running for user {user_id}",
+                "status": "already_in_progress"
+            }
         
         return {
             "message": f"Scenario generation started for user {user_id}",
@@ -539,7 +1032,7 @@ async def trigger_scenario_generation_manual(user_id: int):
             "user_data": {
                 "name": user.get('name'),
                 "gender": gender,
-                "pre_generation_status": user.get('pre_generation_status', 'pending')
+                "pre_generation_status": "in_progress"
             }
         }
     except HTTPException:
@@ -561,7 +1054,7 @@ async def start_voice_generation(request: dict):
             return {"message": "Voice generation skipped - database not available", "status": "skipped"}
         
         # Get user by voice_id
-        user = supabase_service.get_user_by_voice_id(voice_id)
+        user = await asyncio.to_thread(supabase_service.get_user_by_voice_id, voice_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found with voice_id: {voice_id}")
         
@@ -586,7 +1079,15 @@ async def start_voice_generation(request: dict):
         print("🎤 Starting background voice generation task...")
         
         # Start voice generation in background
-        asyncio.create_task(generate_voice_dubs_only(user_id, user_name, voice_id))
+        started = start_background_job(
+            ("voice_dubs", user_id),
+            generate_voice_dubs_only(user_id, user_name, voice_id)
+        )
+        if not started:
+            return {
+                "message": f"Voice generation already running for user {user_id}",
+                "status": "already_in_progress"
+            }
         
         return {
             "message": f"Voice generation started for user {user_id}",
@@ -600,6 +1101,49 @@ async def start_voice_generation(request: dict):
         print(f"❌ Error triggering voice generation: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to trigger voice generation: {str(e)}")
 
+def _parse_ts(value) -> Optional[datetime]:
+    """Parse a Supabase timestamp (ISO string or datetime) into an aware UTC datetime"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)  # 3.11+ parses a trailing 'Z' natively
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+# In-progress runs older than this are considered stuck and may be restarted
+SCENARIO_GENERATION_STALE_SECONDS = 20 * 60
+
+async def claim_scenario_generation(user_id: int) -> bool:
+    """Claim the user's generation run with one conditional UPDATE; False if
+    another request holds it. Fails closed with 503 when the claim cannot be
+    made, since running anyway could start a second paid generation."""
+    try:
+        claimed = await asyncio.to_thread(
+            supabase_service.try_claim_scenario_generation, user_id, SCENARIO_GENERATION_STALE_SECONDS
+        )
+    except Exception as e:
+        logger.error("❌ Could not claim scenario generation for user %s: %s", user_id, e)
+        raise HTTPException(status_code=503, detail="Could not claim scenario generation, try again later")
+    scenario_status_cache.invalidate(user_id)
+    return claimed
+
+# Duplicate-generation guards keyed by the user's current pre_generation_status:
+# (timestamp column, block while younger than N seconds, block when the timestamp
+#  is missing, response status, message template)
+SCENARIO_GENERATION_GUARDS = {
+    'completed': (None, None, True, 'already_completed',
+                  "Scenario generation already completed for user {user_id}"),
+    'in_progress': ('pre_generation_started_at', SCENARIO_GENERATION_STALE_SECONDS, True, 'already_in_progress',
+                    "Scenario generation already in progress for user {user_id}"),
+    # Prevent rapid successive calls (less than 10 seconds apart)
+    'pending': ('updated_at', 10, False, 'rate_limited',
+                "Please wait before retrying (last call {seconds:.1f}s ago)"),
+}
+
 @app.post("/api/start-scenario-generation")
 async def start_scenario_generation(request: dict):
     """Start scenario pre-generation during deepfake introduction"""
@@ -613,10 +1157,11 @@ async def start_scenario_generation(request: dict):
             return {"message": "Scenario generation skipped - database not available", "status": "skipped"}
         
         # Get user by voice_id
-        user = supabase_service.get_user_by_voice_id(voice_id)
+        user = await asyncio.to_thread(supabase_service.get_user_by_voice_id, voice_id)
         if not user:
             raise HTTPException(status_code=404, detail=f"User not found with voice_id: {voice_id}")
         
+        now = datetime.now(timezone.utc)
         user_id = user['id']
         user_image_url = user.get('image_url')
         gender = user.get('gender')
@@ -627,107 +1172,30 @@ async def start_scenario_generation(request: dict):
             raise HTTPException(status_code=400, detail="User missing required data (image_url, gender)")
         
         # BACKEND GUARD: Check if scenario generation is already completed, in progress, or recently triggered
-        if current_status == 'completed':
-            print(f"🛑 BACKEND GUARD: Scenario generation already COMPLETED for user {user_id}")
-            print(f"   - Status: {current_status}")
-            print("   - Skipping duplicate generation to prevent credit waste")
-            return {
-                "message": f"Scenario generation already completed for user {user_id}",
-                "status": "already_completed",
-                "user_data": {
-                    "name": user.get('name'),
-                    "gender": gender,
-                    "pre_generation_status": current_status
-                }
-            }
-        
-        if current_status == 'in_progress':
-            # Check if the process has been running for too long (stuck prevention)
-            started_at = user.get('pre_generation_started_at')
-            current_time = datetime.now()
+        guard = SCENARIO_GENERATION_GUARDS.get(current_status)
+        if guard:
+            timestamp_field, max_age_seconds, block_without_timestamp, blocked_status, message = guard
+            guard_ts = _parse_ts(user.get(timestamp_field)) if timestamp_field else None
+            age_seconds = (now - guard_ts).total_seconds() if guard_ts else None
             
-            if started_at:
-                if isinstance(started_at, str):
-                    # Parse ISO format datetime string
-                    try:
-                        started_dt = datetime.fromisoformat(started_at.replace('Z', '+00:00'))
-                    except:
-                        started_dt = datetime.fromisoformat(started_at)
-                else:
-                    started_dt = started_at
-                
-                # Convert to timezone-aware if needed
-                if started_dt.tzinfo is None:
-                    started_dt = started_dt.replace(tzinfo=timezone.utc)
-                if current_time.tzinfo is None:
-                    current_time = current_time.replace(tzinfo=timezone.utc)
-                    
-                time_running = (current_time - started_dt).total_seconds() / 60  # minutes
-                
-                # If running for more than 20 minutes, consider it stuck and allow restart
-                if time_running > 20:
-                    print(f"⚠️ BACKEND GUARD: Process appears stuck (running {time_running:.1f} minutes)")
-                    print(f"   - Allowing restart for user {user_id}")
-                else:
-                    print(f"🛑 BACKEND GUARD: Scenario generation IN PROGRESS for user {user_id}")
-                    print(f"   - Status: {current_status} (running {time_running:.1f} minutes)")
-                    print("   - Skipping duplicate generation to prevent credit waste")
-                    return {
-                        "message": f"Scenario generation already in progress for user {user_id} ({time_running:.1f} min)",
-                        "status": "already_in_progress",
-                        "user_data": {
-                            "name": user.get('name'),
-                            "gender": gender,
-                            "pre_generation_status": current_status
-                        }
-                    }
-            else:
-                print(f"🛑 BACKEND GUARD: Scenario generation IN PROGRESS for user {user_id}")
-                print(f"   - Status: {current_status} (no start time recorded)")
+            if (age_seconds is None and block_without_timestamp) or (age_seconds is not None and age_seconds < max_age_seconds):
+                age_note = f"{age_seconds:.1f}s ago" if age_seconds is not None else "no timestamp recorded"
+                print(f"🛑 BACKEND GUARD: {blocked_status} for user {user_id}")
+                print(f"   - Status: {current_status} ({age_note})")
                 print("   - Skipping duplicate generation to prevent credit waste")
                 return {
-                    "message": f"Scenario generation already in progress for user {user_id}",
-                    "status": "already_in_progress",
+                    "message": message.format(user_id=user_id, seconds=age_seconds or 0),
+                    "status": blocked_status,
                     "user_data": {
                         "name": user.get('name'),
                         "gender": gender,
                         "pre_generation_status": current_status
                     }
                 }
-        
-        # BACKEND GUARD: Check for rapid successive calls when status is 'pending'
-        if current_status == 'pending':
-            last_updated = user.get('updated_at')
-            if last_updated:
-                if isinstance(last_updated, str):
-                    try:
-                        last_updated_dt = datetime.fromisoformat(last_updated.replace('Z', '+00:00'))
-                    except:
-                        last_updated_dt = datetime.fromisoformat(last_updated)
-                else:
-                    last_updated_dt = last_updated
-                
-                # Convert to timezone-aware if needed
-                if last_updated_dt.tzinfo is None:
-                    last_updated_dt = last_updated_dt.replace(tzinfo=timezone.utc)
-                
-                current_time = datetime.now(timezone.utc)
-                time_since_update = (current_time - last_updated_dt).total_seconds()
-                
-                # Prevent rapid successive calls (less than 10 seconds apart)
-                if time_since_update < 10:
-                    print(f"🛑 BACKEND GUARD: Rapid successive call detected for user {user_id}")
-                    print(f"   - Status: {current_status} (last updated {time_since_update:.1f}s ago)")
-                    print("   - Preventing rapid duplicate calls")
-                    return {
-                        "message": f"Please wait before retrying (last call {time_since_update:.1f}s ago)",
-                        "status": "rate_limited",
-                        "user_data": {
-                            "name": user.get('name'),
-                            "gender": gender,
-                            "pre_generation_status": current_status
-                        }
-                    }
+            
+            if current_status == 'in_progress':
+                print(f"⚠️ BACKEND GUARD: Process appears stuck (running {age_seconds / 60:.1f} minutes)")
+                print(f"   - Allowing restart for user {user_id}")
         
         print("🚀 SCENARIO GENERATION TRIGGER CALLED from DeepfakeIntroduction page")
         print(f"   - User ID: {user_id}")
@@ -737,6 +1205,21 @@ async def start_scenario_generation(request: dict):
         print(f"   - Image URL: {user_image_url[:50]}...")
         print("🎬 Starting background scenario generation task...")
         
+        # The guards above read a snapshot, so two workers can both get this far
+        # for the same user; only the one whose claim succeeds goes on
+        if not await claim_scenario_generation(user_id):
+            print(f"🛑 BACKEND GUARD: already_in_progress for user {user_id} (claimed by another request)")
+            return {
+                "message": f"Scenario generation already in progress for user {user_id}",
+                "status": "already_in_progress",
+                "user_data": {
+                    "name": user.get('name'),
+                    "gender": gender,
+                    "pre_generation_status": "in_progress"
+                }
+            }
+        print("✅ Status updated to in_progress")
+        
         # Complete scenario generation flow (synchronous for Vercel)
         try:
             print("🚀 STARTING: Complete scenario generation")
@@ -744,145 +1227,110 @@ async def start_scenario_generation(request: dict):
             # Get user name from user data
             user_name = user.get('name', 'User')
             
-            # Update status to in_progress (with error handling for missing columns)
-            try:
-                supabase_service.update_user(user_id, {
-                    "pre_generation_status": "in_progress"
-                })
-                print("✅ Status updated to in_progress")
-            except Exception as db_error:
-                print(f"⚠️ DB update warning: {db_error}")
-                # Continue even if status update fails
-            
-            # PHASE 1: Generate face swaps (lottery + crime)
-            print("🔥 PHASE_1: Starting face swap generation (lottery + crime)")
+            # Every scenario is an independent pipeline (face swap -> talking photo) and
+            # every voice dub is an independent job, so run them all concurrently.
+            # A shared semaphore caps in-flight external calls to respect Akool /
+            # ElevenLabs rate limits; one failed job no longer holds up the rest.
+            print(f"🔥 Starting concurrent scenario generation (max {SCENARIO_GENERATION_CONCURRENCY} in flight)")
             
-            scenarios = {
-                'lottery': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case1-{gender.lower()}.png',
-                'crime': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case2-{gender.lower()}.png'
-            }
+            scenarios = scenarios_for_gender(gender)
+            voice_sources = VOICE_DUB_SOURCES
             
             generated_content = {}
+            generation_errors = []
+            semaphore = asyncio.Semaphore(SCENARIO_GENERATION_CONCURRENCY)
             
-            # Generate face swaps sequentially (to avoid timeout)
-            for scenario_key, base_image_url in scenarios.items():
+            async def run_scenario_job(scenario_key: str, base_image_url: str):
                 print(f"🔄 Generating {scenario_key} face swap...")
-                try:
-                    faceswap_result = await generate_faceswap_image({
-                        "userImageUrl": user_image_url,
-                        "baseImageUrl": base_image_url
-                    })
-                    
-                    if faceswap_result and faceswap_result.get('resultUrl'):
-                        generated_content[f'{scenario_key}_faceswap_url'] = faceswap_result['resultUrl']
-                        print(f"✅ {scenario_key} face swap completed")
-                    else:
-                        print(f"❌ {scenario_key} face swap failed")
-                        
-                except Exception as faceswap_error:
-                    print(f"❌ {scenario_key} face swap error: {faceswap_error}")
-            
-            # PHASE 2: Generate talking photos from face swaps
-            print("🔥 PHASE_2: Starting talking photo generation")
-            
-            scenario_scripts = {
-                'lottery': '1등 당첨돼서 정말 기뻐요! 감사합니다!',
-                'crime': '제가 한 거 아니에요... 찍지 마세요. 죄송합니다…'
-            }
-            
-            for scenario_key in scenarios.keys():
-                faceswap_url = generated_content.get(f'{scenario_key}_faceswap_url')
-                if faceswap_url:
-                    print(f"🔄 Generating {scenario_key} talking photo...")
-                    try:
-                        talking_result = await generate_talking_photo({
-                            "caricatureUrl": faceswap_url,
-                            "userName": user_name,
-                            "voiceId": voice_id,
-                            "audioScript": scenario_scripts[scenario_key],
-                            "scenarioType": scenario_key,
-                            "extendedTimeout": True
-                        })
-                        
-                        if talking_result and talking_result.get('videoUrl'):
-                            generated_content[f'{scenario_key}_video_url'] = talking_result['videoUrl']
-                            print(f"✅ {scenario_key} talking photo completed")
-                        else:
-                            print(f"❌ {scenario_key} talking photo failed")
-                            
-                    except Exception as talking_error:
-                        print(f"❌ {scenario_key} talking photo error: {talking_error}")
-            
-            # PHASE 3: Generate voice dubs for module 2
-            print("🔥 PHASE_3: Starting voice dub generation")
-            
-            voice_sources = {
-                'investment_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice1.mp3',
-                'accident_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice2.mp3'
-            }
+                async with semaphore:
+                    faceswap_result = await generate_faceswap_image(FaceSwapRequest(
+                        userImageUrl=user_image_url,
+                        baseImageUrl=base_image_url
+                    ))
+                faceswap_url = faceswap_result.get('resultUrl') if faceswap_result else None
+                if not faceswap_url:
+                    raise Exception(f"{scenario_key} face swap returned no resultUrl")
+                generated_content[f'{scenario_key}_faceswap_url'] = faceswap_url
+                print(f"✅ {scenario_key} face swap completed")
+                
+                print(f"🔄 Generating {scenario_key} talking photo...")
+                async with semaphore:
+                    talking_result = await generate_talking_photo(TalkingPhotoRequest(
+                        caricatureUrl=faceswap_url,
+                        userName=user_name,
+                        voiceId=voice_id,
+                        audioScript=scenarios[scenario_key]['script'],
+                        scenarioType=scenario_key,
+                        extendedTimeout=True
+                    ))
+                video_url = talking_result.get('videoUrl') if talking_result else None
+                if not video_url:
+                    raise Exception(f"{scenario_key} talking photo returned no videoUrl")
+                generated_content[f'{scenario_key}_video_url'] = video_url
+                print(f"✅ {scenario_key} talking photo completed")
             
-            for dub_key, source_url in voice_sources.items():
+            async def run_voice_dub_job(dub_key: str, source_url: str):
                 print(f"🔄 Generating {dub_key}...")
+                async with semaphore:
+                    audio_bytes = await convert_voice_dub(source_url, voice_id, dub_key.replace('_audio', ''))
+                if not audio_bytes:
+                    raise Exception(f"{dub_key} returned no audio")
+                
+                # Upload voice dub to S3 and get CDN URL
                 try:
-                    voice_result = await generate_voice_dub({
-                        "audioUrl": source_url,
-                        "voiceId": voice_id,
-                        "scenarioType": dub_key.replace('_audio', '')
-                    })
+                    # Create unique filename
+                    timestamp = int(time.time())
+                    safe_user_name = _safe_user_name(user_name)
+                    audio_filename = f"voice_dub_{dub_key}_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp3"
+                    audio_object_name = f"voice_dubs/{safe_user_name}/{audio_filename}"
                     
-                    if voice_result and voice_result.get('audioData'):
-                        # Upload voice dub to S3 and get CDN URL
-                        try:
-                            import base64
-                            from io import BytesIO
-                            import time
-                            import uuid
-                            
-                            # Decode base64 audio data
-                            audio_bytes = base64.b64decode(voice_result['audioData'])
-                            
-                            # Create unique filename
-                            timestamp = int(time.time())
-                            safe_user_name = user_name.replace(' ', '_')[:20] if user_name else "user"
-                            audio_filename = f"voice_dub_{dub_key}_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp3"
-                            audio_object_name = f"voice_dubs/{safe_user_name}/{audio_filename}"
-                            
-                            # Upload to S3
-                            audio_file = BytesIO(audio_bytes)
-                            audio_file.name = audio_filename
-                            
-                            s3_client.upload_fileobj(
-                                audio_file, S3_BUCKET_NAME, audio_object_name,
-                                ExtraArgs={
-                                    'ACL': 'public-read',
-                                    'ContentType': 'audio/mpeg',
-                                    'CacheControl': 'max-age=31536000'
-                                }
-                            )
-                            
-                            # Use CloudFront CDN URL
-                            cdn_url = f"https://{CLOUDFRONT_DOMAIN}/{audio_object_name}"
-                            generated_content[dub_key + '_url'] = cdn_url
-                            print(f"✅ {dub_key} completed - uploaded to CDN: {cdn_url}")
-                            
-                        except Exception as upload_error:
-                            print(f"⚠️ S3 upload failed for {dub_key}: {upload_error}")
-                            # Fallback to base64 data URL
-                            audio_data_url = f"data:audio/mpeg;base64,{voice_result['audioData']}"
-                            generated_content[dub_key + '_url'] = audio_data_url
-                            print(f"✅ {dub_key} completed - using base64 fallback")
-                    else:
-                        print(f"❌ {dub_key} failed")
-                        
-                except Exception as voice_error:
-                    print(f"❌ {dub_key} error: {voice_error}")
+                    # Upload to S3 in a single PUT (the MP3 is already in memory), off the event loop
+                    await asyncio.to_thread(
+                        s3_client.put_object,
+                        Bucket=S3_BUCKET_NAME,
+                        Key=audio_object_name,
+                        Body=audio_bytes,
+                        ACL='public-read',
+                        ContentType='audio/mpeg',
+                        CacheControl=IMMUTABLE_CACHE_CONTROL
+                    )
+                    
+                    # Use CloudFront CDN URL
+                    cdn_url = cdn_object_url(audio_object_name)
+                    generated_content[dub_key + '_url'] = cdn_url
+                    print(f"✅ {dub_key} completed - uploaded to CDN: {cdn_url}")
+                    
+                except Exception as upload_error:
+                    print(f"⚠️ S3 upload failed for {dub_key}: {upload_error}")
+                    # Fallback to base64 data URL
+                    audio_data_url = f"data:audio/mpeg;base64,{base64.b64encode(audio_bytes).decode('ascii')}"
+                    generated_content[dub_key + '_url'] = audio_data_url
+                    print(f"✅ {dub_key} completed - using base64 fallback")
+            
+            job_keys = list(scenarios.keys()) + list(voice_sources.keys())
+            job_results = await asyncio.gather(
+                *[run_scenario_job(key, config['base_image']) for key, config in scenarios.items()],
+                *[run_voice_dub_job(key, url) for key, url in voice_sources.items()],
+                return_exceptions=True
+            )
+            
+            # Record per-job failures instead of failing the whole batch
+            for job_key, result in zip(job_keys, job_results):
+                if isinstance(result, Exception):
+                    print(f"❌ {job_key} error: {result}")
+                    generation_errors.append(f"{job_key}: {result}")
             
             # Save all generated content to database
             print("💾 Saving all generated content to database...")
-            generated_content['pre_generation_status'] = 'completed'
+            if not generation_errors:
+                generated_content['pre_generation_status'] = 'completed'
+            else:
+                generated_content['pre_generation_status'] = 'partial_success' if generated_content else 'failed'
+            if generation_errors:
+                generated_content['pre_generation_error'] = f"Partial success: {'; '.join(generation_errors[:3])}"
             
             try:
-                supabase_service.update_user(user_id, generated_content)
+                await asyncio.to_thread(update_user_row, user_id, generated_content)
                 print(f"✅ COMPLETE: Generated {len(generated_content)} items saved to database")
             except Exception as db_error:
                 print(f"⚠️ DB save warning: {db_error}")
@@ -890,13 +1338,11 @@ async def start_scenario_generation(request: dict):
                 # Don't fail the entire process if DB save fails
                 
         except Exception as e:
-            print(f"🚨 SCENARIO GENERATION FAILED: {type(e).__name__}: {str(e)}")
-            import traceback
-            print(f"🚨 FULL TRACEBACK: {traceback.format_exc()}")
+            logger.exception("🚨 Scenario generation failed for user %s: %s: %s", user_id, type(e).__name__, e)
             
             # Update status to failed
             try:
-                supabase_service.update_user(user_id, {
+                await asyncio.to_thread(update_user_row, user_id, {
                     "pre_generation_status": "failed",
                     "pre_generation_error": str(e),
                     "pre_generation_completed_at": "now()"
@@ -926,17 +1372,18 @@ async def start_scenario_generation(request: dict):
         raise HTTPException(status_code=500, detail=f"Failed to start scenario generation: {str(e)}")
 
 @app.post("/api/quiz-answers")
-def create_quiz_answer(quiz_answer: QuizAnswerCreate):
+async def create_quiz_answer(quiz_answer: QuizAnswerCreate):
     """Save quiz answers to Supabase"""
     try:
         # Verify user exists first
         if not supabase_available or not supabase_service:
             raise HTTPException(status_code=503, detail="Database service unavailable")
-        user = supabase_service.get_user(quiz_answer.user_id)
+        user = await asyncio.to_thread(supabase_service.get_user, quiz_answer.user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        result = supabase_service.save_quiz_answer(
+        result = await asyncio.to_thread(
+            supabase_service.save_quiz_answer,
             quiz_answer.user_id, 
             quiz_answer.module, 
             quiz_answer.answers
@@ -945,13 +1392,41 @@ def create_quiz_answer(quiz_answer: QuizAnswerCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save quiz answer: {str(e)}")
 
+@app.post("/api/quiz-answers/bulk")
+async def create_quiz_answers_bulk(quiz_answers: List[QuizAnswerCreate]):
+    """Save a batch of quiz answers (e.g. a whole quiz) in a single insert"""
+    try:
+        if not supabase_available or not supabase_service:
+            raise HTTPException(status_code=503, detail="Database service unavailable")
+        if not quiz_answers:
+            return []
+        
+        # Verify every referenced user exists (normally just one)
+        user_ids = {answer.user_id for answer in quiz_answers}
+        users = await asyncio.gather(*[
+            asyncio.to_thread(supabase_service.get_user_columns, user_id, "id") for user_id in user_ids
+        ])
+        if not all(users):
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        return await asyncio.to_thread(
+            supabase_service.save_quiz_answers_bulk,
+            [answer.model_dump() for answer in quiz_answers]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save quiz answers: {str(e)}")
+
 @app.put("/api/users/{user_id}/progress")
-def update_user_progress(user_id: int, progress: UserProgressUpdate):
+async def update_user_progress(user_id: int, progress: UserProgressUpdate):
     """Update user progress in Supabase"""
     try:
         if not supabase_available or not supabase_service:
             raise HTTPException(status_code=503, detail="Database service unavailable")
-        updated_user = supabase_service.update_user_progress(user_id, progress.dict(exclude_unset=True))
+        updated_user = await asyncio.to_thread(
+            supabase_service.update_user_progress, user_id, progress.model_dump(exclude_unset=True, mode="json")
+        )
         if updated_user is None:
             raise HTTPException(status_code=404, detail="User not found")
         return updated_user
@@ -966,12 +1441,21 @@ async def save_user_info(user: UserCreate):
     try:
         if not supabase_available or not supabase_service:
             raise HTTPException(status_code=503, detail="Database service unavailable")
-        db_user = supabase_service.create_user(user.dict())
+        db_user = await asyncio.to_thread(supabase_service.create_user, user.model_dump())
         return {"success": True, "userId": str(db_user["id"])}
     except Exception as e:
         print(f"Error saving user info: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to save user info: {str(e)}")
 
+@app.post("/api/upload-url")
+async def create_upload_url(request: UploadUrlRequest):
+    """Return a presigned S3 POST so large files can be uploaded straight from the browser"""
+    if not s3_service_available:
+        raise HTTPException(status_code=503, detail="S3 service unavailable")
+    
+    # Allowed content types and the size limit per folder are enforced in s3_service
+    return s3_service.generate_presigned_upload(request.contentType, request.folder)
+
 # Complete onboarding endpoint - handles everything in one atomic operation
 @app.post("/api/complete-onboarding")
 async def complete_onboarding(
@@ -1017,10 +1501,13 @@ async def complete_onboarding(
     MAX_IMAGE_SIZE = 50 * 1024 * 1024  # 50MB for images (iOS can send large HEIC files)
     MAX_AUDIO_SIZE = 100 * 1024 * 1024  # 100MB for audio (iOS recordings can be large)
     
-    image_size = len(await image.read())
+    # Measure sizes by seeking to the end rather than reading whole files into memory
+    image.file.seek(0, os.SEEK_END)
+    image_size = image.file.tell()
     image.file.seek(0)  # Reset file pointer
     
-    audio_size = len(await voice.read()) 
+    voice.file.seek(0, os.SEEK_END)
+    audio_size = voice.file.tell()
     voice.file.seek(0)  # Reset file pointer
     
     print(f"🔍 File size check:")
@@ -1040,13 +1527,15 @@ async def complete_onboarding(
         raise HTTPException(status_code=400, detail="Audio file appears to be corrupted or empty")
     
     try:
-        # Step 1: Upload image to S3
+        # Step 1: Upload image to S3 in the background - it has no dependency on
+        # the voice clone, so the two run concurrently and we await it in step 3
         print(f"\n📤 STEP 1: Uploading image to S3")
         if not s3_client:
             raise HTTPException(status_code=500, detail="S3 client not initialized")
         
-        image_url = await upload_to_s3(image, S3_BUCKET_NAME)
-        print(f"✅ Image uploaded: {image_url}")
+        image_task = asyncio.create_task(upload_to_s3(image, S3_BUCKET_NAME))
+        # Mark a failure as retrieved if voice cloning raises before we await the task
+        image_task.add_done_callback(lambda task: task.cancelled() or task.exception())
         
         # Step 2: Clone voice with ElevenLabs
         print(f"\n🎤 STEP 2: Cloning voice with ElevenLabs")
@@ -1055,7 +1544,7 @@ async def complete_onboarding(
         
         # Debug: Test API key by getting user info
         try:
-            user_info = elevenlabs_client.user.get()
+            user_info = await asyncio.to_thread(elevenlabs_client.user.get)
             print(f"🔍 ElevenLabs user info:")
             print(f"   - Subscription: {getattr(user_info, 'subscription', 'Unknown')}")
             print(f"   - Character count: {getattr(user_info, 'character_count', 'Unknown')}")
@@ -1065,7 +1554,7 @@ async def complete_onboarding(
             print(f"⚠️ Could not get user info: {user_info_error}")
             # Try alternative method
             try:
-                subscription_info = elevenlabs_client.user.get_subscription()
+                subscription_info = await asyncio.to_thread(elevenlabs_client.user.get_subscription)
                 print(f"🔍 ElevenLabs subscription info: {subscription_info}")
             except Exception as sub_error:
                 print(f"⚠️ Could not get subscription info: {sub_error}")
@@ -1077,8 +1566,7 @@ async def complete_onboarding(
         print(f"🔍 Voice file debug:")
         print(f"   - Filename: {voice.filename}")
         print(f"   - Content-Type: {voice.content_type}")
-        print(f"   - File size: {len(await voice.read())} bytes")
-        voice.file.seek(0)  # Reset after reading for size
+        print(f"   - File size: {audio_size} bytes")
         
         # Additional debugging for iOS compatibility
         print(f"🔍 ElevenLabs compatibility check:")
@@ -1094,9 +1582,7 @@ async def complete_onboarding(
         def create_audio_variants(audio_data: bytes, original_content_type: str, original_filename: str):
             """Create multiple audio format variants to try with ElevenLabs"""
             import io
-            import tempfile
             import subprocess
-            import os
             
             variants = []
             
@@ -1201,7 +1687,8 @@ async def complete_onboarding(
         
         # Create audio format variants
         print(f"🔄 Creating multiple audio format variants for ElevenLabs compatibility")
-        audio_variants = create_audio_variants(audio_data, voice.content_type, voice.filename)
+        # ffmpeg conversions are blocking subprocess calls, so build variants off the event loop
+        audio_variants = await asyncio.to_thread(create_audio_variants, audio_data, voice.content_type, voice.filename)
         
         print(f"📋 Available audio format variants: {[f'{name} ({content_type})' for name, _, content_type in audio_variants]}")
         
@@ -1215,11 +1702,14 @@ async def complete_onboarding(
                 print(f"🎯 Trying ElevenLabs voice cloning with {format_name} format ({content_type})")
                 audio_file.seek(0)  # Reset file pointer
                 
-                voice_clone_result = elevenlabs_client.voices.ivc.create(
-                    name=f"UserClonedVoice_{uuid.uuid4().hex[:6]}",
-                    description="Voice cloned from user recording for AI awareness education.",
-                    files=[audio_file],
-                )
+                # Blocking SDK upload; run it in a worker thread so the event loop stays free
+                async with elevenlabs_semaphore:
+                    voice_clone_result = await asyncio.to_thread(
+                        elevenlabs_client.voices.ivc.create,
+                        name=f"UserClonedVoice_{uuid.uuid4().hex[:6]}",
+                        description="Voice cloned from user recording for AI awareness education.",
+                        files=[audio_file],
+                    )
                 
                 voice_id = getattr(voice_clone_result, 'voice_id', None) or getattr(voice_clone_result, 'id', None)
                 voice_name = getattr(voice_clone_result, 'name', None) or f"UserClonedVoice_{uuid.uuid4().hex[:6]}"
@@ -1244,6 +1734,9 @@ async def complete_onboarding(
             print(f"❌ FINAL FAILURE: {error_msg}")
             raise HTTPException(status_code=500, detail=error_msg)
         
+        image_url = await image_task
+        print(f"✅ Image uploaded: {image_url}")
+        
         # Step 3: Create complete user record in Supabase
         print(f"\n💾 STEP 3: Creating user record with all data")
         user_data = {
@@ -1255,7 +1748,7 @@ async def complete_onboarding(
         }
         if not supabase_available or not supabase_service:
             raise HTTPException(status_code=503, detail="Database service unavailable")
-        db_user = supabase_service.create_user(user_data)
+        db_user = await asyncio.to_thread(supabase_service.create_user, user_data)
         
         print(f"✅ User created: ID {db_user['id']}")
         print(f"🎉 COMPLETE: Onboarding finished successfully for {name}")
@@ -1289,67 +1782,109 @@ async def complete_onboarding(
         raise HTTPException(status_code=500, detail=f"Failed to complete onboarding: {str(e)}")
 
 # AI Service endpoints
+def _narration_audio_stream(script: str, voice_id: str):
+    """Start ElevenLabs TTS for a narration; returns the SDK's (blocking) chunk iterator"""
+    return elevenlabs_client.text_to_speech.convert(
+        text=script,
+        voice_id=voice_id,
+        model_id="eleven_multilingual_v2",
+        voice_settings={
+            "stability": 0.6,
+            "similarity_boost": 0.7,
+            "speed": 1.10,  # 10% faster
+            "use_speaker_boost": True   # Enhance speaker characteristics
+        }
+    )
+
+def _narration_cache_key(script: str, voice_id: str) -> tuple:
+    return (voice_id, hashlib.blake2b(script.encode('utf-8'), digest_size=16).hexdigest())
+
+def _check_narration_request() -> None:
+    if not elevenlabs_client:
+        print("❌ ERROR: ElevenLabs client not initialized.")
+        raise HTTPException(status_code=500, detail="ElevenLabs client not initialized.")
+
 @app.post("/api/generate-narration")
-async def generate_narration(request: dict):
+async def generate_narration(request: NarrationRequest):
     """Generate custom narration using ElevenLabs TTS with cloned voice"""
-    script = request.get("script", "")
-    voice_id = request.get("voiceId", "")
+    script = request.script
+    voice_id = request.voiceId
     
     print(f"\n🎙️ STARTING: Generate Custom Narration")
     print(f"  - Script: {script[:50]}...")
     print(f"  - Voice ID: {voice_id}")
     
-    if not elevenlabs_client:
-        print("❌ ERROR: ElevenLabs client not initialized.")
-        raise HTTPException(status_code=500, detail="ElevenLabs client not initialized.")
+    _check_narration_request()
     
-    if not voice_id:
-        print("❌ ERROR: Voice ID is required for narration generation.")
-        raise HTTPException(status_code=400, detail="Voice ID is required.")
+    cache_key = _narration_cache_key(script, voice_id)
+    cached_audio = narration_cache.get(cache_key)
+    if cached_audio is not None:
+        print(f"✅ Narration cache hit ({len(cached_audio)} bytes)")
+        return ORJSONResponse({
+            "audioData": base64.b64encode(cached_audio).decode('utf-8'),
+            "audioType": "audio/mpeg"
+        })
     
     try:
         print(f"🚀 Calling ElevenLabs TTS API")
         print(f"  - Model: eleven_multilingual_v2")
         print(f"  - Voice ID: {voice_id}")
         
-        # Generate speech using ElevenLabs with the cloned voice
-        audio_stream = elevenlabs_client.text_to_speech.convert(
-            text=script,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2",
-            voice_settings={
-                "stability": 0.6,
-                "similarity_boost": 0.7,
-                "speed": 1.10,  # 10% faster
-                "use_speaker_boost": True   # Enhance speaker characteristics
-            }
-        )
+        # Generate speech using ElevenLabs with the cloned voice; the SDK blocks
+        # while streaming, so collect the chunks in a worker thread
+        async with elevenlabs_semaphore:
+            audio_bytes = await asyncio.to_thread(lambda: b"".join(_narration_audio_stream(script, voice_id)))
+        narration_cache.set(cache_key, audio_bytes)
         
         # Return audio data directly as base64 for immediate playback
-        audio_bytes = b"".join(audio_stream)
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
         
         print(f"✅ Custom narration generated successfully!")
         print(f"  - Audio size: {len(audio_bytes)} bytes")
         
-        return {
+        # Returned as a response object so FastAPI skips jsonable_encoder on the
+        # (often megabyte-sized) base64 string and orjson serializes it directly
+        return ORJSONResponse({
             "audioData": audio_base64,
             "audioType": "audio/mpeg"
-        }
+        })
         
     except Exception as e:
         print(f"❌ Error generating narration: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate narration: {str(e)}")
 
-@app.post("/api/generate-voice-dub")
-async def generate_voice_dub(request: dict):
-    """Generate voice dubbing using ElevenLabs Speech-to-Speech API with user's cloned voice"""
-    audio_url = request.get("audioUrl", "")
-    voice_id = request.get("voiceId", "")
-    scenario_type = request.get("scenarioType", "")
+@app.post("/api/generate-narration/stream")
+async def stream_narration(request: NarrationRequest):
+    """Stream narration audio (audio/mpeg) to the client as ElevenLabs generates it,
+    instead of buffering and base64-encoding the whole file"""
+    script = request.script
+    voice_id = request.voiceId
     
-    print(f"\n🎙️ STARTING: Generate Voice Dubbing (Speech-to-Speech)")
-    print(f"  - Audio URL: {audio_url}")
+    _check_narration_request()
+    
+    cache_key = _narration_cache_key(script, voice_id)
+    cached_audio = narration_cache.get(cache_key)
+    if cached_audio is not None:
+        return Response(content=cached_audio, media_type="audio/mpeg")
+    
+    async def audio_chunks():
+        # Holds an ElevenLabs slot for the life of the stream, like the buffered
+        # path; each blocking SDK read runs in a worker thread
+        collected = []
+        async with elevenlabs_semaphore:
+            chunks = iter(await asyncio.to_thread(_narration_audio_stream, script, voice_id))
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                collected.append(chunk)
+                yield chunk
+        narration_cache.set(cache_key, b"".join(collected))
+    
+    return StreamingResponse(audio_chunks(), media_type="audio/mpeg")
+
+async def convert_voice_dub(audio_url: str, voice_id: str, scenario_type: str) -> bytes:
+    """Re-voice the audio at audio_url with the user's cloned voice (ElevenLabs
+    Speech-to-Speech) and return the MP3 bytes"""
+    print(f"\n🎙️ STARTING: Generate Voice Dubbing (Speech-to-Speech)")
+    print(f"  - Audio URL: {audio_url}")
     print(f"  - Voice ID: {voice_id}")
     print(f"  - Scenario Type: {scenario_type}")
     
@@ -1369,10 +1904,9 @@ async def generate_voice_dub(request: dict):
         print(f"🔄 STEP 1: Downloading audio from URL")
         
         # Download audio file from URL
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            audio_response = await client.get(audio_url)
-            audio_response.raise_for_status()
-            audio_content = audio_response.content
+        audio_response = await get_http_client().get(audio_url, timeout=60.0)
+        audio_response.raise_for_status()
+        audio_content = audio_response.content
         
         print(f"  - Downloaded audio size: {len(audio_content)} bytes")
         
@@ -1381,7 +1915,6 @@ async def generate_voice_dub(request: dict):
         print(f"  - Audio URL extension: {audio_url.split('.')[-1]}")
         
         # Create a BytesIO object from the audio content
-        from io import BytesIO
         audio_data = BytesIO(audio_content)
         
         # Set appropriate filename based on URL extension
@@ -1394,7 +1927,7 @@ async def generate_voice_dub(request: dict):
         print(f"  - File name: {audio_data.name}")
         print(f"  - Audio data size: {len(audio_content)} bytes")
         
-        try:
+        def convert_speech() -> bytes:
             # Use Speech-to-Speech API to convert audio with user's cloned voice
             converted_audio = elevenlabs_client.speech_to_speech.convert(
                 voice_id=voice_id,  # User's cloned voice ID
@@ -1402,6 +1935,16 @@ async def generate_voice_dub(request: dict):
                 model_id="eleven_multilingual_sts_v2",  # Multilingual model for Korean
                 output_format="mp3_44100_128"  # High quality MP3 output
             )
+            # The SDK streams the result lazily; collect it here so the network
+            # reads also happen off the event loop
+            if hasattr(converted_audio, '__iter__') and not isinstance(converted_audio, (bytes, bytearray)):
+                return b"".join(converted_audio)
+            return converted_audio
+        
+        try:
+            # The ElevenLabs SDK is synchronous; run the whole conversion in a worker thread
+            async with elevenlabs_semaphore:
+                converted_audio_bytes = await asyncio.to_thread(convert_speech)
             
             print(f"✅ Speech-to-Speech conversion completed successfully!")
             
@@ -1412,39 +1955,53 @@ async def generate_voice_dub(request: dict):
                 detail=f"ElevenLabs Speech-to-Speech API error: {str(conversion_error)}"
             )
         
-        print(f"🔄 STEP 3: Processing converted audio")
-        
-        # Convert audio generator to bytes if needed
-        if hasattr(converted_audio, '__iter__') and not isinstance(converted_audio, (bytes, bytearray)):
-            # If it's a generator, collect all bytes
-            converted_audio_bytes = b"".join(converted_audio)
-        else:
-            # If it's already bytes
-            converted_audio_bytes = converted_audio
-        
-        # Convert to base64 for frontend
-        import base64
-        audio_base64 = base64.b64encode(converted_audio_bytes).decode('utf-8')
-        
         print(f"✅ Voice dubbing completed successfully!")
         print(f"  - Converted audio size: {len(converted_audio_bytes)} bytes")
         print(f"  - Using user's cloned voice: {voice_id}")
         
-        return {
-            "audioData": audio_base64,
-            "audioType": "audio/mpeg",
-            "dubbingId": f"sts_{scenario_type}_{voice_id[:8]}"  # Generate unique ID for tracking
-        }
+        return converted_audio_bytes
         
     except Exception as e:
         print(f"❌ Error generating voice dub: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate voice dub: {str(e)}")
 
+@app.post("/api/generate-voice-dub")
+async def generate_voice_dub(request: VoiceDubRequest):
+    """Generate voice dubbing using ElevenLabs Speech-to-Speech API with user's cloned voice"""
+    voice_id = request.voiceId
+    scenario_type = request.scenarioType
+    audio_bytes = await convert_voice_dub(request.audioUrl, voice_id, scenario_type)
+    
+    # Convert to base64 for frontend
+    return {
+        "audioData": base64.b64encode(audio_bytes).decode('utf-8'),
+        "audioType": "audio/mpeg",
+        "dubbingId": f"sts_{scenario_type}_{voice_id[:8]}"  # Generate unique ID for tracking
+    }
+
+@app.post("/api/generate-voice-dub/audio")
+async def generate_voice_dub_audio(request: VoiceDubRequest):
+    """Same as /api/generate-voice-dub, but returns the MP3 as a binary audio/mpeg
+    body (dubbing id in X-Dubbing-Id) instead of base64 inside JSON"""
+    voice_id = request.voiceId
+    scenario_type = request.scenarioType
+    audio_bytes = await convert_voice_dub(request.audioUrl, voice_id, scenario_type)
+    
+    return Response(
+        content=audio_bytes,
+        media_type="audio/mpeg",
+        headers={"X-Dubbing-Id": f"sts_{scenario_type}_{voice_id[:8]}"}
+    )
+
 @app.post("/api/generate-faceswap-image")
-async def generate_faceswap_image(request: dict):
+async def generate_faceswap_image(request: FaceSwapRequest):
+    # Frozen request models are hashable, so the request itself is the dedup key
+    return await faceswap_flight.do(request, lambda: _generate_faceswap_image(request))
+
+async def _generate_faceswap_image(request: FaceSwapRequest):
     """Generate face-swapped image using Akool high-quality API with face detection"""
-    base_image_url = request.get("baseImageUrl", "")
-    user_image_url = request.get("userImageUrl", "")
+    base_image_url = request.baseImageUrl
+    user_image_url = request.userImageUrl
     
     # Generate face swap image (logging handled by scenario generation)
     
@@ -1452,35 +2009,12 @@ async def generate_faceswap_image(request: dict):
     try:
         akool_auth_token = await get_akool_token()
     except Exception as e:
-        print(f"❌ ERROR: Failed to get Akool token: {e}")
+        logger.error("❌ ERROR: Failed to get Akool token: %s", e)
         raise HTTPException(status_code=500, detail="Akool authentication failed.")
     
-    if not base_image_url:
-        print("❌ ERROR: Base image URL is required.")
-        raise HTTPException(status_code=400, detail="Base image URL is required.")
-        
-    if not user_image_url:
-        print("❌ ERROR: User image URL is required.")
-        raise HTTPException(status_code=400, detail="User image URL is required.")
-    
     try:
-        # Load face swap configuration
-        import json
-        import os
-        config_path = os.path.join(os.path.dirname(__file__), "face_swap_config.json")
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        
-        # Load face swap configuration
-        
         # Find base image configuration
-        base_image_config = None
-        for key, img_config in config["base_images"].items():
-            if img_config["url"] == base_image_url:
-                base_image_config = img_config
-                # Config found for base image
-                break
-        
+        base_image_config = _BASE_IMAGE_BY_URL.get(base_image_url)
         if not base_image_config:
             raise HTTPException(status_code=400, detail="Base image not configured")
         
@@ -1488,144 +2022,141 @@ async def generate_faceswap_image(request: dict):
         if not base_image_opts:
             raise HTTPException(status_code=400, detail="Face opts not configured for base image. Please run detect API first.")
         
-        print("\n" + "-"*80)
-        print("🔍 STEP 2: Get or detect face opts for user image")
+        logger.info("🔍 STEP 2: Get or detect face opts for user image")
         
-        # Skip face opts caching for now (column doesn't exist in current schema)
-        user_image_opts = None
+        user_image_opts = face_opts_cache.get(user_image_url)
         
-        # Always detect face in user image (no caching until face_opts column is added)
-        if True:
-            print(f"  - 🔄 No cached face opts found, detecting face...")
-            import httpx
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                detect_response = await client.post(
+        if user_image_opts:
+            logger.info("  - ✅ Using cached face opts")
+        else:
+            logger.info("  - 🔄 No cached face opts found, detecting face...")
+            async with akool_semaphore:
+                detect_response = await get_http_client().post(
                     "https://sg3.akool.com/detect",
                     headers={"Content-Type": "application/json"},
-                    json={"image_url": user_image_url}
+                    json={"image_url": user_image_url},
+                    timeout=60.0
                 )
-                
-                if detect_response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Face detection failed")
-                
-                detect_data = detect_response.json()
-                user_image_opts = detect_data.get("landmarks_str", "")
-                
-                if not user_image_opts:
-                    raise HTTPException(status_code=400, detail="No face detected in user image")
-                
-                # Skip face opts caching (column doesn't exist yet)
-                # TODO: Add face_opts column to users table for caching
-                pass
+            
+            if detect_response.status_code != 200:
+                raise HTTPException(status_code=500, detail="Face detection failed")
+            
+            detect_data = orjson.loads(detect_response.content)
+            user_image_opts = detect_data.get("landmarks_str", "")
+            
+            if not user_image_opts:
+                raise HTTPException(status_code=400, detail="No face detected in user image")
+            
+            face_opts_cache[user_image_url] = user_image_opts
         
         # Submit high-quality face swap job
         
         # Submit face swap job using high-quality API
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            akool_headers = {
-                "Authorization": f"Bearer {akool_auth_token}",
-                "Content-Type": "application/json"
-            }
-            
-            faceswap_payload = {
-                "targetImage": [{  # Original image (base)
-                    "path": base_image_url,
-                    "opts": base_image_opts
-                }],
-                "sourceImage": [{  # Replacement face (user)
-                    "path": user_image_url,
-                    "opts": user_image_opts
-                }],
-                "face_enhance": 1,  # Enable face enhancement
-                "modifyImage": base_image_url  # The image to modify
-            }
-            
-            print(f"  - Payload: {json.dumps(faceswap_payload, indent=2)}")
-            print(f"  - Making request to Akool high-quality face swap API...")
-            
-            response = await client.post(
+        akool_headers = {
+            "Authorization": f"Bearer {akool_auth_token}",
+            "Content-Type": "application/json"
+        }
+        
+        faceswap_payload = {
+            "targetImage": [{  # Original image (base)
+                "path": base_image_url,
+                "opts": base_image_opts
+            }],
+            "sourceImage": [{  # Replacement face (user)
+                "path": user_image_url,
+                "opts": user_image_opts
+            }],
+            "face_enhance": 1,  # Enable face enhancement
+            "modifyImage": base_image_url  # The image to modify
+        }
+        
+        logger.debug("  - Payload: %s", faceswap_payload)
+        logger.info("  - Making request to Akool high-quality face swap API...")
+        
+        async with akool_semaphore:
+            response = await get_http_client().post(
                 "https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage",
                 headers=akool_headers,
-                json=faceswap_payload
+                json=faceswap_payload,
+                timeout=120.0
             )
+        
+        # Check response status
+        
+        if response.status_code != 200:
+            raise HTTPException(status_code=500, detail=f"Akool API error: {response.status_code}")
+        
+        response_data = AkoolResponse.model_validate_json(response.content)
+        
+        if not response_data.ok:
+            error_msg = response_data.msg or "Unknown Akool error"
+            raise HTTPException(status_code=500, detail=f"Akool error: {error_msg}")
+        
+        # Check if result is immediately available or needs polling
+        data = response_data.data or AkoolData()
+        result_url = data.url
+        job_id = data.job_id
+        task_id = data.id
+        
+        logger.debug("🔍 Akool response analysis:")
+        logger.debug("  - result_url: %s", result_url)
+        logger.debug("  - job_id: %s", job_id)
+        logger.debug("  - task_id: %s", task_id)
+        
+        if result_url:
+            # Face swap completed immediately
+            logger.info("✅ Face swap completed immediately")
+        else:
+            # Face swap needs polling - simple implementation
+            if not task_id:
+                logger.error("❌ No task ID returned from Akool, but this might be normal for immediate results")
+                raise HTTPException(status_code=500, detail="Face swap failed - no result or task ID")
             
-            # Check response status
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=500, detail=f"Akool API error: {response.status_code}")
-            
-            response_data = response.json()
-            
-            if response_data.get("code") != 1000:
-                error_msg = response_data.get("msg", "Unknown Akool error")
-                raise HTTPException(status_code=500, detail=f"Akool error: {error_msg}")
-            
-            # Check if result is immediately available or needs polling
-            data = response_data.get("data", {})
-            result_url = data.get("url")
-            job_id = data.get("job_id")
-            task_id = data.get("_id")
+            logger.info("⏳ Face swap job submitted for polling. Task ID: %s", task_id)
             
-            print(f"\n🔍 DEBUG: Akool response analysis:")
-            print(f"  - Response data keys: {list(response_data.keys())}")
-            print(f"  - Data keys: {list(data.keys()) if data else 'No data object'}")
-            print(f"  - result_url: {result_url}")
-            print(f"  - job_id: {job_id}")
-            print(f"  - task_id: {task_id}")
+            # Poll with exponential backoff (first check after ~2s) for up to 2 minutes
+            backoff = PollBackoff(min_s=2.0, max_s=15.0, deadline_s=120)
             
-            if result_url:
-                # Face swap completed immediately
-                print(f"✅ Face swap completed immediately")
-            else:
-                # Face swap needs polling - simple implementation
-                if not task_id:
-                    print(f"❌ No task ID returned from Akool, but this might be normal for immediate results")
-                    raise HTTPException(status_code=500, detail="Face swap failed - no result or task ID")
-                
-                print(f"⏳ Face swap job submitted for polling. Task ID: {task_id}")
-                
-                # Simple polling - check every 10 seconds for up to 2 minutes
-                max_attempts = 12  # 2 minutes with 10-second intervals
+            async for attempt in backoff:
+                logger.debug("[Face Swap Poll %s] Checking status...", attempt)
                 
-                for attempt in range(max_attempts):
-                    await asyncio.sleep(10)  # Wait 10 seconds between checks
+                try:
+                    status_url = f"https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage/status?task_id={task_id}"
                     
-                    print(f"[Face Swap Poll {attempt + 1}/{max_attempts}] Checking status...")
+                    async with akool_semaphore:
+                        status_response = await get_http_client().get(
+                            status_url, 
+                            headers={"Authorization": f"Bearer {akool_auth_token}"},
+                            timeout=30.0
+                        )
+                    backoff.honor_retry_after(status_response)
                     
-                    try:
-                        status_url = f"https://openapi.akool.com/api/open/v3/faceswap/highquality/specifyimage/status?task_id={task_id}"
+                    if status_response.status_code == 200:
+                        status_data = AkoolResponse.model_validate_json(status_response.content)
                         
-                        async with httpx.AsyncClient(timeout=30.0) as status_client:
-                            status_response = await status_client.get(
-                                status_url, 
-                                headers={"Authorization": f"Bearer {akool_auth_token}"}
-                            )
+                        if status_data.ok:
+                            job_data = status_data.data or AkoolData()
+                            job_status = job_data.status
                             
-                            if status_response.status_code == 200:
-                                status_data = status_response.json()
-                                
-                                if status_data.get("code") == 1000:
-                                    job_data = status_data.get("data", {})
-                                    job_status = job_data.get("status")
-                                    
-                                    print(f"  - Status: {job_status}")
-                                    
-                                    if job_status == "completed":
-                                        result_url = job_data.get("url") or job_data.get("result_url")
-                                        if result_url:
-                                            print(f"✅ Face swap polling completed")
-                                            break
-                                    elif job_status == "failed":
-                                        raise HTTPException(status_code=500, detail="Face swap failed")
-                                    # Continue polling for other statuses
-                                
-                    except Exception as poll_error:
-                        print(f"  - Polling error: {poll_error}")
-                        if attempt == max_attempts - 1:
-                            raise HTTPException(status_code=500, detail="Face swap polling failed")
-                
-                if not result_url:
-                    raise HTTPException(status_code=500, detail="Face swap timed out")
+                            logger.info("  - Status: %s", job_status)
+                            
+                            if job_status == "completed":
+                                result_url = job_data.url or job_data.result_url
+                                if result_url:
+                                    logger.info("✅ Face swap polling completed")
+                                    break
+                            elif job_status == "failed":
+                                raise HTTPException(status_code=500, detail="Face swap failed")
+                            # Continue polling for other statuses
+                            
+                except HTTPException:
+                    raise
+                except Exception as poll_error:
+                    logger.info("  - Polling error: %s", poll_error)
+                    backoff.reset()
+            
+            if not result_url:
+                raise HTTPException(status_code=500, detail="Face swap timed out")
         
         # Handle result URL
         
@@ -1633,102 +2164,112 @@ async def generate_faceswap_image(request: dict):
         final_url = result_url
         
         # Log only the final result
-        print(f"✅ FaceSwap result: {final_url}")
+        logger.info("✅ FaceSwap result: %s", final_url)
         
         return {"resultUrl": final_url}
         
     except Exception as e:
-        print(f"❌ Error generating faceswap image: {e}")
+        logger.error("❌ Error generating faceswap image: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate faceswap image: {str(e)}")
 
 @app.post("/api/generate-talking-photo")
-async def generate_talking_photo(request: dict):
+async def generate_talking_photo(request: TalkingPhotoRequest):
     """Generate talking photo using Akool API with user's cloned voice and store video in S3"""
-    caricature_url = request.get("caricatureUrl", "")
-    user_name = request.get("userName", "")
-    voice_id = request.get("voiceId", "")
-    audio_script = request.get("audioScript", "")  # Custom audio script for scenarios
-    scenario_type = request.get("scenarioType", "default")  # For different sample videos
-    extended_timeout = request.get("extendedTimeout", False)  # For pre-generation with longer timeout
-    
-    print("\n" + "="*80)
+    return await talking_photo_flight.do(request, lambda: _generate_talking_photo(request))
+
+async def _generate_talking_photo(request: TalkingPhotoRequest):
+    caricature_url = request.caricatureUrl
+    user_name = request.userName
+    voice_id = request.voiceId
+    audio_script = request.audioScript
+    scenario_type = request.scenarioType
+    extended_timeout = request.extendedTimeout
+    
     # Generate talking photo (logging handled by scenario generation)
-
-    # Get valid Akool token
-    try:
-        akool_auth_token = await get_akool_token()
-    except Exception as e:
-        print(f"❌ ERROR: Failed to get Akool token: {e}")
-        raise HTTPException(status_code=500, detail="Akool authentication failed.")
     
-    if not caricature_url:
-        raise HTTPException(status_code=400, detail="Caricature URL is required.")
-    if not user_name:
-        raise HTTPException(status_code=400, detail="User name is required.")
-    if not voice_id:
-        raise HTTPException(status_code=400, detail="Voice ID is required.")
     if not elevenlabs_client:
         raise HTTPException(status_code=500, detail="ElevenLabs client not initialized.")
     
+    # Fetch the Akool token while TTS + audio upload run; it's only needed for the create call
+    akool_token_task = asyncio.create_task(get_akool_token())
+    akool_token_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    
     try:
         # Step 1: Use custom audio script or generate default
         if audio_script:
             korean_script = audio_script
-            print(f"  - Using custom audio script: {korean_script}")
+            logger.info("  - Using custom audio script: %s", korean_script)
         else:
             korean_script = f"안녕하세요, 저는 {user_name} 선생님이에요. 만나서 반가워요~"
-            print(f"  - Using default script: {korean_script}")
+            logger.info("  - Using default script: %s", korean_script)
         
-        print("\n" + "-"*80)
         # Generate personalized audio with ElevenLabs
         
-        # Generate speech using ElevenLabs with the cloned voice
-        audio_stream = elevenlabs_client.text_to_speech.convert(
-            text=korean_script,
-            voice_id=voice_id,
-            model_id="eleven_multilingual_v2",
-            voice_settings={
-                "stability": 0.5,
-                "similarity_boost": 0.8,
-                "speed": 1.1  # 10% faster
-            }
-        )
-        
-        # Save audio to S3 with user-specific naming
-        audio_bytes = b"".join(audio_stream)
-        # Create unique filename with user name and timestamp
         timestamp = int(time.time())
-        # Convert Korean/non-ASCII characters to ASCII-safe format
-        import unicodedata
-        safe_user_name = unicodedata.normalize('NFKD', user_name).encode('ascii', 'ignore').decode('ascii')
-        safe_user_name = "".join(c for c in safe_user_name if c.isalnum() or c in (' ', '-', '_')).rstrip()[:20]
-        if not safe_user_name:  # If no ASCII characters remain, use generic name
-            safe_user_name = "user"
-        audio_filename = f"talking_photo_audio_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp3"
+        safe_user_name = _safe_user_name(user_name)
+        
+        # Audio is keyed by what produces it (voice, model, script), so a repeat
+        # of the same script in the same voice reuses the existing S3 object
+        audio_digest = hashlib.blake2b(
+            f"{voice_id}\0{TALKING_PHOTO_TTS_MODEL}\0{korean_script}".encode("utf-8"), digest_size=12
+        ).hexdigest()
+        audio_filename = f"tp_{safe_user_name}_{audio_digest}.mp3"
         
         # Upload to S3 with user-specific path
         audio_object_name = f"talking_photo_audio/{safe_user_name}/{audio_filename}"
         
-        print(f"📤 Uploading generated audio to S3: {audio_object_name}")
+        logger.info("📤 Uploading generated audio to S3: %s", audio_object_name)
         
-        # Create temporary file-like object for S3 upload
-        audio_file = BytesIO(audio_bytes)
-        audio_file.name = audio_filename
-        s3_client.upload_fileobj(
-            audio_file,
-            S3_BUCKET_NAME,
-            audio_object_name,
-            ExtraArgs={'ACL': 'public-read', 'ContentType': 'audio/mpeg'}
-        )
+        def synthesize_and_upload() -> bool:
+            try:
+                s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=audio_object_name)
+                return False
+            except ClientError:
+                pass  # Not uploaded yet (or not visible to us); generate it
+            
+            # Generate speech using ElevenLabs with the cloned voice
+            audio_stream = elevenlabs_client.text_to_speech.convert(
+                text=korean_script,
+                voice_id=voice_id,
+                model_id=TALKING_PHOTO_TTS_MODEL,
+                voice_settings={
+                    "stability": 0.5,
+                    "similarity_boost": 0.8,
+                    "speed": 1.1  # 10% faster
+                }
+            )
+            # Pipe the TTS chunks straight into S3 as they arrive instead of
+            # joining the whole MP3 in memory first
+            s3_client.upload_fileobj(
+                IteratorReader(audio_stream),
+                S3_BUCKET_NAME,
+                audio_object_name,
+                ExtraArgs={'ACL': 'public-read', 'ContentType': 'audio/mpeg', 'CacheControl': IMMUTABLE_CACHE_CONTROL},
+                Config=TRANSFER_CONFIG
+            )
+            return True
+        
+        # Both SDKs are blocking; run TTS + upload in a worker thread
+        async with elevenlabs_semaphore:
+            uploaded = await asyncio.to_thread(synthesize_and_upload)
         
         # Use CloudFront CDN URL for faster audio delivery
-        audio_url = f"https://{CLOUDFRONT_DOMAIN}/{audio_object_name}"
-        print(f"✅ Audio generated and uploaded to S3")
-        print(f"  - S3 Object: {audio_object_name}")
-        print(f"  - Safe user name: '{safe_user_name}'")
-        print(f"  - Full URL: {audio_url}")
+        audio_url = cdn_object_url(audio_object_name)
+        if uploaded:
+            logger.info("✅ Audio generated and uploaded to S3")
+        else:
+            logger.info("✅ Reusing audio already in S3 for this script and voice")
+        logger.info("  - S3 Object: %s", audio_object_name)
+        logger.info("  - Safe user name: '%s'", safe_user_name)
+        logger.info("  - Full URL: %s", audio_url)
+        
+        # Get valid Akool token
+        try:
+            akool_auth_token = await akool_token_task
+        except Exception as e:
+            logger.error("❌ ERROR: Failed to get Akool token: %s", e)
+            raise HTTPException(status_code=500, detail="Akool authentication failed.")
         
-        import httpx
         akool_headers = {
             "Authorization": f"Bearer {akool_auth_token}",
             "Content-Type": "application/json"
@@ -1740,260 +2281,262 @@ async def generate_talking_photo(request: dict):
         }
         
         # Skip URL validation - Akool validates URLs internally
-        print("\n" + "-"*80)
         
-        print(f"  - Endpoint: POST https://openapi.akool.com/api/open/v3/content/video/createbytalkingphoto")
-        print(f"  - Payload: {json.dumps(akool_payload, indent=2)}")
-        print("-"*80)
+        logger.info("  - Endpoint: POST https://openapi.akool.com/api/open/v3/content/video/createbytalkingphoto")
+        logger.debug("  - Payload: %s", akool_payload)
         
         # Single attempt - if it fails, use scenario-specific sample video
-        sample_video_urls = {
-            "lottery": f"https://{CLOUDFRONT_DOMAIN}/video-url/scenario1_sample.mp4",
-            "criminal": f"https://{CLOUDFRONT_DOMAIN}/video-url/scenario1_sample.mp4", 
-            "accident_call": f"https://{CLOUDFRONT_DOMAIN}/video-url/scenario2_sample.mp4",
-            "default": f"https://{CLOUDFRONT_DOMAIN}/sample/talking_photo_sample.mp4"
-        }
-        sample_video_url = sample_video_urls.get(scenario_type, sample_video_urls["default"])
-        
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                print(f"🔄 STEP 3: Calling Akool API (single attempt)")
-                akool_response = await client.post(
+            logger.info("🔄 STEP 3: Calling Akool API (single attempt)")
+            async with akool_semaphore:
+                akool_response = await get_http_client().post(
                     "https://openapi.akool.com/api/open/v3/content/video/createbytalkingphoto",
                     headers=akool_headers,
-                    json=akool_payload
+                    json=akool_payload,
+                    timeout=60.0
                 )
-                
-                print("\n" + "-"*80)
-                print("📬 STEP 3: Received response from Akool creation API")
-                print(f"  - Status Code: {akool_response.status_code}")
-                try:
-                    akool_result = akool_response.json()
-                    print(f"  - Response Body: {json.dumps(akool_result, indent=2)}")
-                except json.JSONDecodeError:
-                    akool_result = {}
-                    print(f"  - Response Body (non-JSON): {akool_response.text}")
-                print("-"*80)
-
-                if akool_response.status_code != 200:
-                    print(f"❌ Akool API failed (status {akool_response.status_code}), using sample video")
-                    return {
-                        "videoUrl": sample_video_url,
-                        "message": "서버 과부하로 인해 샘플 영상을 보여드립니다",
-                        "isSample": True
-                    }
+            
+            logger.info("📬 STEP 3: Received response from Akool creation API")
+            logger.info("  - Status Code: %s", akool_response.status_code)
+            try:
+                akool_result = AkoolResponse.model_validate_json(akool_response.content)
+                logger.debug("  - Response Body: %s", akool_result)
+            except ValidationError:
+                akool_result = AkoolResponse()
+                logger.debug("  - Response Body (unexpected): %s", akool_response.text)
+
+            if akool_response.status_code != 200:
+                logger.error("❌ Akool API failed (status %s), using sample video", akool_response.status_code)
+                return sample_video_response(scenario_type)
                     
         except Exception as e:
-            print(f"❌ Akool API call failed: {e}, using sample video")
-            return {
-                "videoUrl": sample_video_url,
-                "message": "서버 과부하로 인해 샘플 영상을 보여드립니다",
-                "isSample": True
-            }
+            logger.error("❌ Akool API call failed: %s, using sample video", e)
+            return sample_video_response(scenario_type)
 
-        if akool_result.get("code") != 1000:
-            print(f"❌ Akool API returned business error code: {akool_result.get('code')}, using sample video")
-            return {
-                "videoUrl": sample_video_url,
-                "message": "서버 과부하로 인해 샘플 영상을 보여드립니다",
-                "isSample": True
-            }
+        if not akool_result.ok:
+            logger.error("❌ Akool API returned business error code: %s, using sample video", akool_result.code)
+            return sample_video_response(scenario_type)
 
-        task_data = akool_result.get("data", {})
-        task_id = task_data.get("_id") or task_data.get("video_id")
+        task_data = akool_result.data or AkoolData()
+        task_id = task_data.id or task_data.video_id
         if not task_id:
-            print("❌ ERROR: Akool API response did not contain a task ID.")
+            logger.error("❌ ERROR: Akool API response did not contain a task ID.")
             raise HTTPException(status_code=500, detail="Akool API did not return a task ID.")
             
-        print(f"\n" + "-"*80)
-        print(f"🔄 STEP 4: Starting to poll for video status (Task ID: {task_id})")
+        logger.info("🔄 STEP 4: Starting to poll for video status (Task ID: %s)", task_id)
         
         # Use extended timeout for pre-generation scenarios
-        if extended_timeout:
-            print(f"  - Strategy: Extended timeout for pre-generation (5s, 10s, 15s, 20s, 30s intervals)")
-            print(f"  - Max Duration: 13 minutes total")
-            polling_intervals = [5, 10, 15, 20, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30]  # ~13 minutes
-        else:
-            print(f"  - Strategy: Standard timeout (5s, 10s, 15s, 20s, 30s intervals)")
-            print(f"  - Max Duration: 8 minutes total")
-            polling_intervals = [5, 10, 15, 20, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30]  # ~8 minutes
-            
-        print(f"  - Initial delay: 5 seconds to allow job initialization")
-        print("-"*80)
-            
-        # Give Akool time to initialize the job
-        await asyncio.sleep(5)
-        for attempt, interval in enumerate(polling_intervals):
-            if attempt > 0:  # Skip sleep on first attempt since we already waited 5 seconds
-                await asyncio.sleep(interval)
-                print(f"  - Next poll in {polling_intervals[attempt] if attempt < len(polling_intervals)-1 else 30}s")
-                
+        max_duration_s = 13 * 60 if extended_timeout else 8 * 60
+        logger.info("  - Strategy: Exponential backoff (5s growing to 30s intervals)")
+        logger.info("  - Max Duration: %s minutes total", max_duration_s // 60)
+        
+        # First poll after ~5s gives Akool time to initialize the job
+        backoff = PollBackoff(min_s=5.0, max_s=30.0, deadline_s=max_duration_s)
+        async for attempt in backoff:
             status_url = f"https://openapi.akool.com/api/open/v3/content/video/infobymodelid?video_model_id={task_id}"
-            print(f"\n[Polling - Attempt {attempt + 1}/{len(polling_intervals)}]")
-            print(f"  - Calling: GET {status_url}")
+            logger.debug("[Polling - Attempt %s]", attempt)
+            logger.debug("  - Calling: GET %s", status_url)
             
             polling_headers = {"Authorization": f"Bearer {akool_auth_token}"}
-            print(f"  - Using headers: Authorization: Bearer {akool_auth_token[:10]}...")
+            logger.debug("  - Using headers: Authorization: Bearer %s...", akool_auth_token[:10])
             
-            async with httpx.AsyncClient(timeout=30.0) as status_client:
-                status_response = await status_client.get(
+            async with akool_semaphore:
+                status_response = await get_http_client().get(
                     status_url,
-                    headers=polling_headers
+                    headers=polling_headers,
+                    timeout=30.0
                 )
+            backoff.honor_retry_after(status_response)
+            
+            if status_response.status_code == 200:
+                try:
+                    status_result = AkoolResponse.model_validate_json(status_response.content)
+                    logger.debug("  - Response: %s", status_result)
+                    
+                    # Handle cases where Akool returns a non-1000 code in a 200 OK response
+                    if not status_result.ok:
+                        logger.info("  - Akool returned non-success code %s: %s", status_result.code, status_result.msg)
+                        # This could mean the job is still processing, not necessarily a final error.
+                        # We'll rely on the video_status field.
+                        pass
+
+                    status_data = status_result.data
+                    if status_data is None or not status_data.model_fields_set:
+                        logger.info("  - Status: Job still initializing or in queue...")
+                        continue
+
+                    video_status = status_data.video_status
+
+                except ValidationError:
+                    logger.debug("  - Invalid JSON response: %s", status_response.text)
+                    continue
                 
-                if status_response.status_code == 200:
+                status_map = {1: "Queueing", 2: "Processing", 3: "Completed", 4: "Failed"}
+                logger.info("  - Received Status: %s (%s)", video_status, status_map.get(video_status, 'Unknown'))
+
+                if video_status == 1:  # Queueing
+                    logger.info("  - Status: Queueing...")
+                    continue  # Keep polling for queueing status
+                elif video_status == 2:  # Processing
+                    logger.info("  - Status: Processing...")
+                    continue  # Keep polling for processing status
+
+                if video_status == 3:  # Completed
+                    logger.info("✅ STEP 5: Video generation completed!")
+                    akool_video_url = status_data.video # Per docs, URL is in 'video'
+                    logger.info("  - Akool Video URL: %s", akool_video_url)
+
+                    if not akool_video_url:
+                        raise HTTPException(status_code=500, detail="Akool response missing video URL")
+                    
+                    logger.info("📥 STEP 6: Downloading video from Akool and uploading to our S3")
+                    
                     try:
-                        status_result = status_response.json()
-                        print(f"  - Response: {status_result}")
+                        video_filename = f"talking_photo_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp4"
+                        video_object_name = f"talking_photos/{safe_user_name}/{video_filename}"
                         
-                        # Handle cases where Akool returns a non-1000 code in a 200 OK response
-                        if status_result.get("code") != 1000:
-                            print(f"  - Akool returned non-success code {status_result.get('code')}: {status_result.get('msg')}")
-                            # This could mean the job is still processing, not necessarily a final error.
-                            # We'll rely on the video_status field.
-                            pass
-
-                        status_data = status_result.get("data", {})
-                        if not status_data:
-                            print("  - Status: Job still initializing or in queue...")
-                            continue
-
-                        video_status = status_data.get("video_status")
-
-                    except json.JSONDecodeError:
-                        print(f"  - Invalid JSON response: {status_response.text}")
-                        continue
-                    
-                    status_map = {1: "Queueing", 2: "Processing", 3: "Completed", 4: "Failed"}
-                    print(f"  - Received Status: {video_status} ({status_map.get(video_status, 'Unknown')})")
-
-                    if video_status == 1:  # Queueing
-                        print("  - Status: Queueing...")
-                        continue  # Keep polling for queueing status
-                    elif video_status == 2:  # Processing
-                        print("  - Status: Processing...")
-                        continue  # Keep polling for processing status
-
-                    if video_status == 3:  # Completed
-                        print("\n" + "-"*80)
-                        print("✅ STEP 5: Video generation completed!")
-                        akool_video_url = status_data.get("video", "") # Per docs, URL is in 'video'
-                        print(f"  - Akool Video URL: {akool_video_url}")
-
-                        if not akool_video_url:
-                            raise HTTPException(status_code=500, detail="Akool response missing video URL")
+                        # Stream the MP4 from Akool into S3 part by part as it downloads;
+                        # on timeout the multipart upload is aborted and we fall back
+                        # to the Akool URL below
+                        await asyncio.wait_for(mirror_url_to_s3(akool_video_url, video_object_name, {
+                            'ACL': 'public-read', 
+                            'ContentType': 'video/mp4',
+                            'CacheControl': IMMUTABLE_CACHE_CONTROL,
+                            'Metadata': {
+                                'optimized-for': 'web-delivery',
+                                'generated-by': 'ai-awareness-platform'
+                            }
+                        }), timeout=MIRROR_TIMEOUT_SECONDS)
                         
-                        print("\n" + "-"*80)
-                        print("📥 STEP 6: Downloading video from Akool and uploading to our S3")
+                        # Use CloudFront CDN URL for faster delivery
+                        cloudfront_url = cdn_object_url(video_object_name)
                         
-                        try:
-                            # Use a new client for downloading since the polling client might be closed
-                            async with httpx.AsyncClient(timeout=120.0) as download_client:
-                                video_response = await download_client.get(akool_video_url, follow_redirects=True)
-                                video_response.raise_for_status()
-                                
-                                video_file = BytesIO(video_response.content)
-                                video_filename = f"talking_photo_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp4"
-                                video_object_name = f"talking_photos/{safe_user_name}/{video_filename}"
-                                
-                                s3_client.upload_fileobj(
-                                    video_file, S3_BUCKET_NAME, video_object_name,
-                                    ExtraArgs={
-                                        'ACL': 'public-read', 
-                                        'ContentType': 'video/mp4',
-                                        'CacheControl': 'max-age=31536000',  # Cache for 1 year
-                                        'Metadata': {
-                                            'optimized-for': 'web-delivery',
-                                            'generated-by': 'ai-awareness-platform'
-                                        }
-                                    }
-                                )
-                                
-                                # Use CloudFront CDN URL for faster delivery
-                                cloudfront_url = f"https://{CLOUDFRONT_DOMAIN}/{video_object_name}"
-                                
-                                print(f"  - Uploaded to S3: {video_object_name}")
-                                print(f"  - CloudFront URL: {cloudfront_url}")
-                                print("-"*80)
-
-                                print("\n" + "="*80)
-                                print("🎉 SUCCESS: Talking Photo generation complete (using CDN).")
-                                print("="*80)
-
-                                # Note: Scenario pre-generation now triggered during deepfake introduction
-
-                                return {"videoUrl": cloudfront_url}
-                                
-                        except Exception as upload_error:
-                            print(f"❌ S3 upload failed: {upload_error}")
-                            print("💡 Using Akool URL directly as fallback")
-                            
-                            print("\n" + "="*80)
-                            print("🎉 SUCCESS: Using Akool video URL directly.")
-                            print("="*80)
-                            
-                            # Note: Scenario pre-generation now triggered during deepfake introduction
+                        logger.info("  - Uploaded to S3: %s", video_object_name)
+                        logger.info("  - CloudFront URL: %s", cloudfront_url)
+
+                        logger.info("🎉 SUCCESS: Talking Photo generation complete (using CDN).")
+
+                        # Note: Scenario pre-generation now triggered during deepfake introduction
+
+                        return {"videoUrl": cloudfront_url}
                             
-                            return {"videoUrl": akool_video_url}
+                    except Exception as upload_error:
+                        logger.error("❌ S3 upload failed: %s", upload_error)
+                        logger.info("💡 Using Akool URL directly as fallback")
                         
-                    elif video_status == 4:  # Failed
-                        error_message = status_data.get("error_msg", "Akool video generation failed")
-                        print(f"❌ ERROR: {error_message}, using sample video")
+                        logger.info("🎉 SUCCESS: Using Akool video URL directly.")
                         
                         # Note: Scenario pre-generation now triggered during deepfake introduction
                         
-                        return {
-                            "videoUrl": sample_video_url,
-                            "message": "서버 과부하로 인해 샘플 영상을 보여드립니다",
-                            "isSample": True
-                        }
-                else:
-                    print(f"  - Received non-200 status on poll: {status_response.status_code} - {status_response.text}")
+                        return {"videoUrl": akool_video_fallback_url(akool_video_url)}
+                    
+                elif video_status == 4:  # Failed
+                    error_message = status_data.error_msg or "Akool video generation failed"
+                    logger.error("❌ ERROR: %s, using sample video", error_message)
+                    
+                    # Note: Scenario pre-generation now triggered during deepfake introduction
+                    
+                    return sample_video_response(scenario_type)
+            else:
+                logger.debug("  - Received non-200 status on poll: %s - %s", status_response.status_code, status_response.text)
+                backoff.reset()
         
         # This timeout logic should only run AFTER the for loop completes (all polling attempts exhausted)
-        timeout_duration = "13 minutes" if extended_timeout else "8 minutes"
-        print("\n" + "!"*80)
-        print(f"⏰ TIMEOUT: Akool video generation timed out after {timeout_duration}.")
-        print("💡 Using sample video fallback due to timeout")
-        print(f"   - Task ID: {task_id}")
-        print(f"   - Total attempts: {len(polling_intervals)}")
-        print(f"   - Extended timeout: {extended_timeout}")
-        print("!"*80)
+        timeout_duration = f"{max_duration_s // 60} minutes"
+        logger.warning("⏰ TIMEOUT: Akool video generation timed out after %s.", timeout_duration)
+        logger.info("💡 Using sample video fallback due to timeout")
+        logger.info("   - Task ID: %s", task_id)
+        logger.info("   - Total attempts: %s", backoff.attempt)
+        logger.info("   - Extended timeout: %s", extended_timeout)
         
         # Note: Scenario pre-generation now triggered during deepfake introduction
         
-        return {
-            "videoUrl": sample_video_url,
-            "message": "서버 과부하로 인해 샘플 영상을 보여드립니다",
-            "isSample": True
-        }
+        return sample_video_response(scenario_type)
             
     except Exception as e:
-        print("\n" + "!"*80)
-        print(f"🔥 UNHANDLED ERROR in generate_talking_photo: {e}")
-        print("!"*80)
+        logger.error("🔥 UNHANDLED ERROR in generate_talking_photo: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate talking photo: {str(e)}")
 
-@app.post("/api/analyze-face")
-async def analyze_face(request: dict):
-    """Analyze image for artistic elements to create zepeto style cartoon avatar"""
-    image_url = request.get("imageUrl", "")
+# Long-running generation endpoints that can also be run as background jobs
+async def _voice_dub_job(request: VoiceDubRequest) -> dict:
+    """voice-dub job: store the MP3 on S3 and return its URL, so the job record
+    holds a link instead of the base64 audio"""
+    if not s3_client:
+        raise HTTPException(status_code=503, detail="S3 client not available")
+    audio_bytes = await convert_voice_dub(request.audioUrl, request.voiceId, request.scenarioType)
+    audio_object_name = f"voice_dubs/jobs/{uuid.uuid4().hex}.mp3"
+    await asyncio.to_thread(
+        s3_client.put_object,
+        Bucket=S3_BUCKET_NAME,
+        Key=audio_object_name,
+        Body=audio_bytes,
+        ACL='public-read',
+        ContentType='audio/mpeg',
+        CacheControl=IMMUTABLE_CACHE_CONTROL
+    )
+    return {"audioUrl": cdn_object_url(audio_object_name)}
+
+JOB_HANDLERS = {
+    "faceswap-image": (FaceSwapRequest, generate_faceswap_image),
+    "talking-photo": (TalkingPhotoRequest, generate_talking_photo),
+    "voice-dub": (VoiceDubRequest, _voice_dub_job),
+}
+
+@app.post("/api/jobs/{job_type}", status_code=202)
+async def submit_job(job_type: str, request: dict):
+    """Start a faceswap / talking-photo / voice-dub generation in the background and
+    return a job id right away, instead of holding the connection for minutes.
+    Jobs live in this process's memory, so poll the same deployment that accepted them."""
+    if job_type not in JOB_HANDLERS:
+        raise HTTPException(status_code=404, detail=f"Unknown job type: {job_type}")
+    request_model, handler = JOB_HANDLERS[job_type]
+    try:
+        payload = request_model.model_validate(request)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
+    if len(running_jobs) >= MAX_RUNNING_JOBS:
+        raise HTTPException(status_code=429, detail="Too many jobs running, retry later", headers={"Retry-After": "30"})
+    
+    job_id = uuid.uuid4().hex
+    job = {"jobId": job_id, "type": job_type, "status": "running", "createdAt": time.time()}
+    running_jobs[job_id] = job
+    
+    async def run_job():
+        try:
+            result = await handler(payload)
+            summary = {field: result[field] for field in JOB_RESULT_FIELDS if field in result}
+            jobs[job_id] = {**job, "status": "completed", "result": summary, "completedAt": time.time()}
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            jobs[job_id] = {**job, "status": "failed", "error": detail, "completedAt": time.time()}
+        finally:
+            running_jobs.pop(job_id, None)
+    
+    start_background_job(("job", job_id), run_job())
+    return {"jobId": job_id, "status": "running"}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a job started with POST /api/jobs/{job_type}; includes result or error once finished"""
+    job = running_jobs.get(job_id) or jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def _face_analysis_response(visual_description: str) -> dict:
+    return {
+        "facialFeatures": {
+            "description": visual_description,
+            "analysis_type": "ai_vision_enhanced",
+            "suitable_for_caricature": True,
+            "educational_purpose": True,
+            "detailed_analysis": True
+        }
+    }
 
-    try:        
-        if openai_client:
-            try:
-                print("\n" + "-"*80)
-                print("🚀 Calling OpenAI Vision API (gpt-4.1-mini)")
-                # Attempt to get general artistic description
-                response = openai_client.chat.completions.create(
-                    model="gpt-4.1-mini",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "text",
-                                    "text": """Analyze this Korean person's facial features for cartoon character creation. Use this exact format without bold text, introductions, or extra explanations:
+# Vision prompt for analyze_face; its output becomes {features} in CARICATURE_PROMPT_TEMPLATE
+FACE_ANALYSIS_PROMPT = """Analyze this Korean person's facial features for cartoon character creation. Use this exact format without bold text, introductions, or extra explanations:
 
 BASIC INFO: Age range, gender, Korean ethnicity
 FACE STRUCTURE: Face shape, jawline definition, cheekbone prominence, forehead size
@@ -2007,43 +2550,66 @@ SKIN: Tone, texture, complexion
 DISTINCTIVE FEATURES: Unique characteristics, memorable traits
 
 Output only the analysis in plain text format."""
-                                },
-                                {
-                                    "type": "image_url",
-                                    "image_url": {"url": image_url}
-                                }
-                            ]
-                        }
-                    ],
-                    max_tokens=250
-                )
-                
-                visual_description = response.choices[0].message.content
-                
-                print("\n" + "-"*80)
-                print("📬 Received response from OpenAI Vision API")
-                print(f"  - Analysis Result:\n{visual_description}")
-                print("-"*80)
 
-                return {
-                    "facialFeatures": {
-                        "description": visual_description,
-                        "analysis_type": "ai_vision_enhanced",
-                        "suitable_for_caricature": True,
-                        "educational_purpose": True,
-                        "detailed_analysis": True
+async def _describe_face(image_url: str) -> str:
+    """One OpenAI vision call for analyze_face; caches the description by URL"""
+    logger.info("🚀 Calling OpenAI Vision API (gpt-4.1-mini)")
+    # Attempt to get general artistic description
+    response = await openai_client.chat.completions.create(
+        model="gpt-4.1-mini",
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": FACE_ANALYSIS_PROMPT
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {"url": image_url}
                     }
-                }
+                ]
+            }
+        ],
+        max_tokens=250
+    )
+    
+    visual_description = response.choices[0].message.content
+    if visual_description and image_url:
+        face_analysis_cache[image_url] = visual_description
+    
+    logger.info("📬 Received response from OpenAI Vision API")
+    logger.debug("  - Analysis Result:\n%s", visual_description)
+    return visual_description
+
+@app.post("/api/analyze-face")
+async def analyze_face(request: dict):
+    """Analyze image for artistic elements to create zepeto style cartoon avatar"""
+    image_url = request.get("imageUrl", "")
+
+    try:        
+        cached_description = face_analysis_cache.get(image_url) if image_url else None
+        if cached_description is not None:
+            logger.info("✅ Face analysis cache hit")
+            return _face_analysis_response(cached_description)
+        
+        if openai_client:
+            try:
+                if image_url:
+                    visual_description = await face_analysis_flight.do(
+                        image_url, lambda: _describe_face(image_url)
+                    )
+                else:
+                    visual_description = await _describe_face(image_url)
+                return _face_analysis_response(visual_description)
                 
             except Exception as vision_error:
-                print("\n" + "!"*80)
-                print(f"⚠️  OpenAI Vision analysis failed (This may be expected due to safety restrictions): {vision_error}")
-                print("!"*80)
+                logger.warning("⚠️  OpenAI Vision analysis failed (This may be expected due to safety restrictions): %s", vision_error)
                 # Fall back to educational mock analysis
                 pass
         
         # Fallback: Create varied mock analysis for different demographics
-        import random
         
         # Create more varied and realistic descriptions
         age_ranges = ["Young Adult", "Adult", "Middle-aged"]
@@ -2118,26 +2684,16 @@ DISTINCTIVE FEATURES: Expressive eyes, friendly demeanor, youthful appearance"""
         }
         
     except Exception as e:
-        print("\n" + "!"*80)
-        print(f"🔥 UNHANDLED ERROR in analyze_face: {e}")
-        print("!"*80)
+        logger.error("🔥 UNHANDLED ERROR in analyze_face: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to create educational analysis: {str(e)}")
 
 # Removed broken Responses API function - using DALL-E 3 directly
 
-async def generate_caricature_with_dalle3(features_description: str, prompt_details: str, task_id: str = None) -> str:
-
-
-    try:
-        print("\n" + "-"*80)
-        print("📝 Preparing DALL-E 3 Prompt using structured features")
-        print(f"  - Features Received:\n{features_description}")
-        print("-"*80)
-        
-        # Create stylized cartoon character prompt in Zepeto/Mario style
-        caricature_prompt = f"""60 years old Korean3D cartoon character in Zepeto Korean mobile app style on PLAIN WHITE BACKGROUND.
+# DALL-E 3 prompt for the Zepeto-style caricature; {features} is the vision
+# analysis, {details} optional extra instructions from the client
+CARICATURE_PROMPT_TEMPLATE = """60 years old Korean3D cartoon character in Zepeto Korean mobile app style on PLAIN WHITE BACKGROUND.
 MANDATORY FACIAL FEATURES - COPY EXACTLY:
-{features_description}
+{features}
 
 HAIR STYLE REQUIREMENTS (CRITICAL):
 - If description says "ear-length" hair, make hair END AT THE EARS
@@ -2160,79 +2716,81 @@ STYLE: 3D cartoon, Zepeto Korean mobile aesthetic, cel-shading, bright colors, f
 - The character must be above 60 years old.
 COMPLIANCE REQUIRED: The character must look exactly like the description or the image is rejected.
 
-{prompt_details if prompt_details else ''}"""
+{details}"""
+
+# Short feature descriptions with no extra instructions render the same at
+# "standard" quality, which is about twice as fast and half the price of "hd"
+DALLE_HD_MIN_FEATURES_CHARS = 300
+DALLE_QUALITIES = ("standard", "hd")
+
+async def generate_caricature_with_dalle3(features_description: str, prompt_details: str, task_id: str = None, quality: Optional[str] = None) -> str:
+    # DALL-E takes 10-20 s; open the S3 connection meanwhile so the upload starts warm
+    s3_warm_up = None
+    if s3_client:
+        s3_warm_up = asyncio.create_task(asyncio.to_thread(s3_client.head_bucket, Bucket=S3_BUCKET_NAME))
+        s3_warm_up.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    try:
+        logger.info("📝 Preparing DALL-E 3 Prompt using structured features")
+        logger.debug("  - Features Received:\n%s", features_description)
+        
+        # Create stylized cartoon character prompt in Zepeto/Mario style
+        caricature_prompt = CARICATURE_PROMPT_TEMPLATE.format(features=features_description, details=prompt_details or "")
+        
+        # HD only pays off when there is detail to render
+        if quality not in DALLE_QUALITIES:
+            quality = "hd" if prompt_details or len(features_description) > DALLE_HD_MIN_FEATURES_CHARS else "standard"
         
-        print("\n" + "-"*80)
-        print("🚀 Calling DALL-E 3 API")
-        print(f"  - Prompt Snippet: {caricature_prompt[:300]}...")
-        print("-"*80)
+        logger.info("🚀 Calling DALL-E 3 API")
+        logger.info("  - Quality: %s", quality)
+        logger.debug("  - Prompt Snippet: %.300s...", caricature_prompt)
         
         # Generate image using DALL-E 3 with optimized parameters
-        response = openai_client.images.generate(
+        response = await openai_client.images.generate(
             model="dall-e-3",
             prompt=caricature_prompt,
             size="1024x1024",
-            quality="hd",  # Use HD quality for better facial detail
+            quality=quality,
             style="vivid",  # Vivid style for better cartoon characters
             n=1,
         )
         
         generated_image_url = response.data[0].url
 
-        print("\n" + "-"*80)
-        print("📬 Received response from DALL-E 3 API")
-        print(f"  - Generated Image URL: {generated_image_url}")
-        print("-"*80)
+        logger.info("📬 Received response from DALL-E 3 API")
+        logger.info("  - Generated Image URL: %s", generated_image_url)
 
         # Download and upload to S3
-        print("\n" + "-"*80)
-        print("📥 Downloading image from DALL-E and uploading to S3")
-        import httpx
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Update progress: Downloading generated image
-            if task_id:
-                progress_tracking[task_id]["progress"] = 70
-                progress_tracking[task_id]["message"] = "Downloading generated image..."
-            
-            try:
-                image_response = await client.get(generated_image_url)
-                image_response.raise_for_status()
-                print(f"  - Downloaded {len(image_response.content)} bytes from DALL-E")
-            except Exception as download_error:
-                print(f"❌ Failed to download image from DALL-E: {download_error}")
-                raise Exception(f"Failed to download generated image: {download_error}")
+        logger.info("📥 Downloading image from DALL-E and uploading to S3")
+        # Update progress: Downloading generated image
+        if task_id:
+            set_progress(task_id, 70, "Downloading generated image and uploading to secure storage...")
+        
+        try:
+            image_object_name = f"caricatures/caricature_{uuid.uuid4().hex[:8]}.png"
             
-            # Update progress: Uploading to S3
-            if task_id:
-                progress_tracking[task_id]["progress"] = 90
-                progress_tracking[task_id]["message"] = "Uploading to secure storage..."
+            if s3_warm_up:
+                await asyncio.gather(s3_warm_up, return_exceptions=True)
             
-            try:
-                image_filename = f"caricature_{uuid.uuid4().hex[:8]}.png"
-                
-                # Upload using consolidated S3 service
-                caricature_url = s3_service.upload_file(
-                    image_response.content, 
-                    'image/png', 
-                    'caricatures', 
-                    image_filename
-                )
-                print(f"  - Uploaded to S3: {caricature_url}")
-                print("-"*80)
+            # Stream the PNG from DALL-E straight into S3 (a single put_object
+            # for anything under one multipart part) without materializing .content
+            await mirror_url_to_s3(generated_image_url, image_object_name, {
+                'ACL': 'public-read',
+                'ContentType': 'image/png',
+                'CacheControl': IMMUTABLE_CACHE_CONTROL
+            })
+            caricature_url = cdn_object_url(image_object_name)
+            logger.info("  - Uploaded to S3: %s", caricature_url)
 
-                print("\n" + "="*80)
-                print("🎉 SUCCESS: Caricature generation complete.")
-                print("="*80)
-                
-                return caricature_url
-            except Exception as s3_error:
-                print(f"❌ Failed to upload to S3: {s3_error}")
-                raise Exception(f"Failed to upload caricature to S3: {s3_error}")
+            logger.info("🎉 SUCCESS: Caricature generation complete.")
             
+            return caricature_url
+        except Exception as s3_error:
+            logger.error("❌ Failed to copy DALL-E image to S3: %s", s3_error)
+            raise Exception(f"Failed to upload caricature to S3: {s3_error}")
+        
     except Exception as e:
-        print("\n" + "!"*80)
-        print(f"🔥 DALL-E 3 ERROR: {e}")
-        print("!"*80)
+        logger.error("🔥 DALL-E 3 ERROR: %s", e)
         raise e
 
 @app.post("/api/generate-caricature")
@@ -2240,46 +2798,35 @@ async def generate_caricature(request: dict):
     """Generate caricature using DALL-E 3 and store in S3"""
     facial_features = request.get("facialFeatures", {})
     prompt_details = request.get("promptDetails", "")
+    quality = request.get("quality")  # Optional "standard" / "hd" override
     
     # Generate task ID for progress tracking
     task_id = f"caricature_{uuid.uuid4().hex[:8]}"
-    progress_tracking[task_id] = {
-        "progress": 0,
-        "message": "Starting caricature generation...",
-        "completed": False,
-        "timestamp": time.time()
-    }
+    set_progress(task_id, 0, "Starting caricature generation...")
     
     if not openai_client:
         raise HTTPException(status_code=500, detail="OpenAI client not initialized.")
     
     try:
         # Update progress: Starting analysis
-        progress_tracking[task_id]["progress"] = 20
-        progress_tracking[task_id]["message"] = "Analyzing facial features..."
+        set_progress(task_id, 20, "Analyzing facial features...")
         
         features_description = facial_features.get("description", "")
         
         # Update progress: Starting DALL-E generation
-        progress_tracking[task_id]["progress"] = 40
-        progress_tracking[task_id]["message"] = "Generating caricature with DALL-E 3..."
+        set_progress(task_id, 40, "Generating caricature with DALL-E 3...")
         
         # Use DALL-E 3 directly with improved prompts
-        caricature_url = await generate_caricature_with_dalle3(features_description, prompt_details, task_id)
+        caricature_url = await generate_caricature_with_dalle3(features_description, prompt_details, task_id, quality)
         
         # Final progress update
-        progress_tracking[task_id]["progress"] = 100
-        progress_tracking[task_id]["message"] = "Caricature generation completed!"
-        progress_tracking[task_id]["completed"] = True
-        progress_tracking[task_id]["caricatureUrl"] = caricature_url
+        set_progress(task_id, 100, "Caricature generation completed!", completed=True, caricatureUrl=caricature_url)
         
         return {"caricatureUrl": caricature_url, "taskId": task_id}
         
     except Exception as e:
         # Update progress on error
-        progress_tracking[task_id]["progress"] = -1
-        progress_tracking[task_id]["message"] = f"Error: {str(e)}"
-        progress_tracking[task_id]["completed"] = True
+        set_progress(task_id, -1, f"Error: {str(e)}", completed=True)
         
         print(f"Error generating caricature: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate caricature: {str(e)}")
@@ -2290,7 +2837,7 @@ async def generate_faceswap_video(request: dict):
     base_video_url = request.get("baseVideoUrl", "")
     user_image_url = request.get("userImageUrl", "")
     
-    if not AKOOL_API_KEY:
+    if not settings.akool_api_key:
         raise HTTPException(status_code=500, detail="Akool API key not configured.")
     
     try:
@@ -2307,19 +2854,94 @@ async def generate_faceswap_video(request: dict):
 # ===================================================================================
 # HYBRID STRATEGY ENDPOINTS
 # ===================================================================================
+def update_user_row(user_id: int, update_data: dict):
+    """supabase_service.update_user plus dropping the cached scenario status"""
+    try:
+        return supabase_service.update_user(user_id, update_data)
+    finally:
+        scenario_status_cache.invalidate(user_id)
+
+class UserUpdateBatcher:
+    """Merges partial column updates for one user and writes them with a single
+    update_user_row call per window, so pipelines finishing close together cost
+    one Supabase round-trip instead of one each. close() flushes everything put
+before it returns and may be called more than once."""
+
+    def __init__(self, user_id: int, window: float = 0.25):
+        self.user_id = user_id
+        self.window = window
+        self._pending: dict = {}
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    def put(self, fields: dict) -> None:
+        self._pending.update(fields)
+        self._wake.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+
+    async def _run(self) -> None:
+        while True:
+            if not self._closed:
+                await self._wake.wait()
+                if not self._closed:
+                    await asyncio.sleep(self.window)
+            self._wake.clear()
+            if self._pending:
+                batch, self._pending = self._pending, {}
+                try:
+                    await asyncio.to_thread(update_user_row, self.user_id, batch)
+                    logger.debug("💾 Saved %s for user %s", ", ".join(batch), self.user_id)
+                except Exception as e:
+                    logger.warning("⚠️ Partial save failed for user %s (%s): %s", self.user_id, ", ".join(batch), e)
+            if self._closed and not self._pending:
+                return
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check: "*" or any listed tag equal under weak comparison"""
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+def conditional_json_response(request: Request, content: dict) -> Response:
+    """JSON response with a content-hash ETag and a revalidate-every-time
+    Cache-Control, answering 304 when the client already holds the same body"""
+    body = orjson.dumps(content)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": STATUS_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # Simple scenario status endpoint
 @app.get("/api/scenario-status/{user_id}")
-async def get_scenario_status(user_id: int):
+async def get_scenario_status(user_id: int, request: Request):
     """Get scenario generation status for user"""
     try:
         if not supabase_available or not supabase_service:
             return {"status": "unknown", "error": "Database unavailable"}
         
-        user = supabase_service.get_user(user_id)
+        cached_status = scenario_status_cache.get(user_id)
+        if cached_status is not None:
+            return conditional_json_response(request, cached_status)
+        
+        # Fetch only the status/URL columns instead of the whole user row
+        user = await asyncio.to_thread(supabase_service.get_user_columns, user_id, supabase_service.SCENARIO_STATUS_COLUMNS)
         if not user:
             return {"status": "user_not_found"}
             
-        return {
+        scenario_status = {
             'status': user.get('pre_generation_status', 'pending'),
             'started_at': user.get('pre_generation_started_at'),
             'completed_at': user.get('pre_generation_completed_at'),
@@ -2333,10 +2955,29 @@ async def get_scenario_status(user_id: int):
                 'accident_call_audio_url': user.get('accident_call_audio_url')
             }
         }
+        terminal = scenario_status['status'] in SCENARIO_STATUS_TERMINAL
+        scenario_status_cache.set(user_id, scenario_status, ttl=SCENARIO_STATUS_TERMINAL_TTL if terminal else None)
+        return conditional_json_response(request, scenario_status)
     except Exception as e:
         print(f"❌ Scenario status error: {e}")
         return {"status": "unknown", "error": str(e)}
 
+@app.post("/api/scenario-status/{user_id}/invalidate")
+async def invalidate_scenario_status(user_id: int):
+    """Drop the cached scenario status, for writers outside this process"""
+    scenario_status_cache.invalidate(user_id)
+    return {"success": True}
+
+# log_progress status -> icon for scenario generation logs
+_LOG_ICONS = {
+    "START": "🚀",
+    "SUCCESS": "✅",
+    "ERROR": "❌",
+    "SAVE": "💾",
+    "INFO": "ℹ️",
+    "PHASE": "🔥"
+}
+
 # Trigger scenario pre-generation after caricature completion
 
 async def generate_scenario_content_simple(user_id: int, user_image_url: str, voice_id: str, gender: str):
@@ -2344,41 +2985,20 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
     
     def log_progress(step: str, message: str, status: str = "INFO"):
         """Clean progress logging with consistent format"""
-        status_icon = {
-            "START": "🚀",
-            "SUCCESS": "✅", 
-            "ERROR": "❌",
-            "SAVE": "💾",
-            "INFO": "ℹ️",
-            "PHASE": "🔥"
-        }.get(status, "•")
-        print(f"[USER {user_id}] {status_icon} {step}: {message}")
+        level = logging.ERROR if status == "ERROR" else logging.INFO
+        logger.log(level, "[USER %s] %s %s: %s", user_id, _LOG_ICONS.get(status, "•"), step, message)
+    
+    partial_saves = UserUpdateBatcher(user_id)
     
     try:
         log_progress("SCENARIO_GEN", "Starting background scenario generation", "START")
         log_progress("SETUP", f"Gender: {gender}, Voice: {voice_id[:8]}...", "INFO")
         
-        # Update user status to in_progress with timestamp
-        try:
-            supabase_service.update_user(user_id, {
-                'pre_generation_status': 'in_progress',
-                'pre_generation_started_at': datetime.now(timezone.utc).isoformat()
-            })
-            log_progress("DB_UPDATE", "Status set to 'in_progress'", "SAVE")
-        except Exception as status_error:
-            log_progress("DB_ERROR", f"Could not update status: {status_error}", "ERROR")
+        # The caller has already moved the user to 'in_progress' through
+        # claim_scenario_generation, so no status write here
         
         # Scenario configuration
-        scenarios = {
-            'lottery': {
-                'base_image': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case1-{gender.lower()}.png',
-                'script': '1등 당첨돼서 정말 기뻐요! 감사합니다!'
-            },
-            'crime': {
-                'base_image': f'https://d3srmxrzq4dz1v.cloudfront.net/video-url/fakenews-case2-{gender.lower()}.png',
-                'script': '제가 한 거 아니에요... 찍지 마세요. 죄송합니다…'
-            }
-        }
+        scenarios = scenarios_for_gender(gender)
         
         # Voice dubs are now generated separately via /api/start-voice-generation
         # This function now only handles video generation (face swaps + talking photos)
@@ -2400,176 +3020,155 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
                 sample_video_url = "https://d3srmxrzq4dz1v.cloudfront.net/talking_photos/user/talking_photo_user_1752755401_feb5f6.mp4"
             
             # Save sample video URL directly (skip face swap)
-            try:
-                partial_update = {
-                    f'{scenario_key}_faceswap_url': None,  # Mark as skipped
-                    f'{scenario_key}_video_url': sample_video_url  # Use sample video directly
-                }
-                supabase_service.update_user(user_id, partial_update)
-                log_progress(f"FACESWAP_{scenario_key.upper()}", f"Sample video saved: {sample_video_url}", "SAVE")
-            except Exception as save_error:
-                log_progress(f"FACESWAP_{scenario_key.upper()}", f"Sample video save failed: {save_error}", "ERROR")
+            partial_saves.put({
+                f'{scenario_key}_faceswap_url': None,  # Mark as skipped
+                f'{scenario_key}_video_url': sample_video_url  # Use sample video directly
+            })
+            log_progress(f"FACESWAP_{scenario_key.upper()}", f"Sample video queued for save: {sample_video_url}", "SAVE")
             
             # Return special marker to indicate video was handled
             return scenario_key, "SAMPLE_VIDEO_USED", config
 
         async def generate_faceswap_with_save(scenario_key: str, config: dict):
             """Generate face swap and save immediately"""
-            try:
-                log_progress(f"FACESWAP_{scenario_key.upper()}", "Starting generation", "INFO")
-                print(f"🔍 DEBUG: About to call generate_faceswap_image for {scenario_key}")
-                print(f"  - User Image: {user_image_url}")
-                print(f"  - Base Image: {config['base_image']}")
-                
-                # Add timeout protection for face swap generation
-                faceswap_result = await asyncio.wait_for(
-                    generate_faceswap_image({
-                        "userImageUrl": user_image_url,
-                        "baseImageUrl": config['base_image']
-                    }),
-                    timeout=360  # 6 minutes timeout for face swap (allows for 5-minute polling + buffer)
-                )
-                
-                faceswap_url = faceswap_result.get('resultUrl')
-                if faceswap_url:
-                    log_progress(f"FACESWAP_{scenario_key.upper()}", "Generation completed", "SUCCESS")
-                    
-                    # Save partial result immediately
-                    try:
-                        partial_update = {f'{scenario_key}_faceswap_url': faceswap_url}
-                        supabase_service.update_user(user_id, partial_update)
-                        log_progress(f"FACESWAP_{scenario_key.upper()}", "URL saved to database", "SAVE")
-                    except Exception as save_error:
-                        log_progress(f"FACESWAP_{scenario_key.upper()}", f"Save failed: {save_error}", "ERROR")
+            # One faceswap pipeline slot for the whole job, fallbacks and saves included
+            async with faceswap_pipeline_semaphore:
+                try:
+                    log_progress(f"FACESWAP_{scenario_key.upper()}", "Starting generation", "INFO")
+                    logger.debug("🔍 About to call generate_faceswap_image for %s", scenario_key)
+                    logger.debug("  - User Image: %s", user_image_url)
+                    logger.debug("  - Base Image: %s", config['base_image'])
                     
-                    return scenario_key, faceswap_url, config
-                else:
-                    raise Exception(f"No resultUrl in faceswap response: {faceswap_result}")
+                    # Add timeout protection for face swap generation
+                    faceswap_result = await asyncio.wait_for(
+                        generate_faceswap_image(FaceSwapRequest(
+                            userImageUrl=user_image_url,
+                            baseImageUrl=config['base_image']
+                        )),
+                        timeout=360  # 6 minutes timeout for face swap (allows for 5-minute polling + buffer)
+                    )
                     
-            except asyncio.TimeoutError:
-                log_progress(f"FACESWAP_{scenario_key.upper()}", "Timeout after 5 minutes", "ERROR")
-                # Handle lottery scenario fallback
-                if scenario_key == 'lottery':
-                    return await handle_lottery_fallback(scenario_key, config)
-                return scenario_key, None, config
-            except Exception as e:
-                log_progress(f"FACESWAP_{scenario_key.upper()}", f"Failed: {str(e)}", "ERROR")
-                print(f"🚨 CRITICAL ERROR in generate_faceswap_with_save({scenario_key}): {e}")
-                print(f"  - Error type: {type(e).__name__}")
-                import traceback
-                print(f"  - Traceback: {traceback.format_exc()}")
-                # Handle lottery scenario fallback
-                if scenario_key == 'lottery':
-                    return await handle_lottery_fallback(scenario_key, config)
-                return scenario_key, None, config
+                    faceswap_url = faceswap_result.get('resultUrl')
+                    if faceswap_url:
+                        log_progress(f"FACESWAP_{scenario_key.upper()}", "Generation completed", "SUCCESS")
+                        
+                        # Save partial result (batched with other pipelines finishing now)
+                        partial_saves.put({f'{scenario_key}_faceswap_url': faceswap_url})
+                        log_progress(f"FACESWAP_{scenario_key.upper()}", "URL queued for database", "SAVE")
+                        
+                        return scenario_key, faceswap_url, config
+                    else:
+                        raise Exception(f"No resultUrl in faceswap response: {faceswap_result}")
+                        
+                except asyncio.TimeoutError:
+                    log_progress(f"FACESWAP_{scenario_key.upper()}", "Timeout after 5 minutes", "ERROR")
+                    # Handle lottery scenario fallback
+                    if scenario_key == 'lottery':
+                        return await handle_lottery_fallback(scenario_key, config)
+                    return scenario_key, None, config
+                except Exception as e:
+                    log_progress(f"FACESWAP_{scenario_key.upper()}", f"Failed: {str(e)}", "ERROR")
+                    logger.error("🚨 CRITICAL ERROR in generate_faceswap_with_save(%s): %s: %s", scenario_key, type(e).__name__, e, exc_info=True)
+                    # Handle lottery scenario fallback
+                    if scenario_key == 'lottery':
+                        return await handle_lottery_fallback(scenario_key, config)
+                    return scenario_key, None, config
                 
         async def generate_talking_photo_with_save(scenario_key: str, faceswap_url: str, config: dict):
             """Generate talking photo and save immediately"""
-            try:
-                log_progress(f"VIDEO_{scenario_key.upper()}", f"Starting with script: '{config['script'][:30]}...'", "INFO")
-                
-                # Add timeout protection for talking photo generation
-                talking_result = await asyncio.wait_for(
-                    generate_talking_photo({
-                        "caricatureUrl": faceswap_url,
-                        "userName": f"User-{user_id}",  
-                        "voiceId": voice_id,
-                        "audioScript": config['script'],
-                        "scenarioType": scenario_key
-                    }),
-                    timeout=480  # 8 minutes timeout for talking photo
-                )
-                
-                video_url = talking_result.get('videoUrl')
-                if video_url:
-                    log_progress(f"VIDEO_{scenario_key.upper()}", "Generation completed", "SUCCESS")
-                    
-                    # Save partial result immediately
-                    try:
-                        partial_update = {f'{scenario_key}_video_url': video_url}
-                        supabase_service.update_user(user_id, partial_update)
-                        log_progress(f"VIDEO_{scenario_key.upper()}", "URL saved to database", "SAVE")
-                    except Exception as save_error:
-                        log_progress(f"VIDEO_{scenario_key.upper()}", f"Save failed: {save_error}", "ERROR")
+            # One talking photo pipeline slot for the whole job, fallbacks and saves included
+            async with talking_photo_pipeline_semaphore:
+                try:
+                    log_progress(f"VIDEO_{scenario_key.upper()}", f"Starting with script: '{config['script'][:30]}...'", "INFO")
                     
-                    return scenario_key, video_url
-                else:
-                    raise Exception(f"No videoUrl in talking photo response: {talking_result}")
+                    # Add timeout protection for talking photo generation
+                    talking_result = await asyncio.wait_for(
+                        generate_talking_photo(TalkingPhotoRequest(
+                            caricatureUrl=faceswap_url,
+                            userName=f"User-{user_id}",  
+                            voiceId=voice_id,
+                            audioScript=config['script'],
+                            scenarioType=scenario_key
+                        )),
+                        timeout=480  # 8 minutes timeout for talking photo
+                    )
                     
-            except asyncio.TimeoutError:
-                log_progress(f"VIDEO_{scenario_key.upper()}", "Timeout after 8 minutes", "ERROR")
-                return scenario_key, None
-            except Exception as e:
-                log_progress(f"VIDEO_{scenario_key.upper()}", f"Failed: {str(e)}", "ERROR")
-                return scenario_key, None
+                    video_url = talking_result.get('videoUrl')
+                    if video_url:
+                        log_progress(f"VIDEO_{scenario_key.upper()}", "Generation completed", "SUCCESS")
+                        
+                        # Save partial result (batched with other pipelines finishing now)
+                        partial_saves.put({f'{scenario_key}_video_url': video_url})
+                        log_progress(f"VIDEO_{scenario_key.upper()}", "URL queued for database", "SAVE")
+                        
+                        return scenario_key, video_url
+                    else:
+                        raise Exception(f"No videoUrl in talking photo response: {talking_result}")
+                        
+                except asyncio.TimeoutError:
+                    log_progress(f"VIDEO_{scenario_key.upper()}", "Timeout after 8 minutes", "ERROR")
+                    return scenario_key, None
+                except Exception as e:
+                    log_progress(f"VIDEO_{scenario_key.upper()}", f"Failed: {str(e)}", "ERROR")
+                    return scenario_key, None
                 
         async def generate_voice_dub_with_save(dub_key: str, source_url: str):
             """Generate voice dub using Speech-to-Speech API and save immediately"""
-            try:
-                log_progress(f"AUDIO_{dub_key.upper()}", "Starting voice dubbing", "INFO")
-                
-                # Add timeout protection for voice dub generation
-                voice_result = await asyncio.wait_for(
-                    generate_voice_dub({
-                        "audioUrl": source_url,
-                        "voiceId": voice_id,
-                        "scenarioType": dub_key.replace('_audio', '')
-                    }),
-                    timeout=360  # 6 minutes timeout for voice dub (matches 5-minute polling + buffer)
-                )
-                
-                # Fix: Check for the correct response format from voice dub API
-                if voice_result and 'audioData' in voice_result:
-                    # Handle S3 upload if we have binary audio data
-                    try:
-                        audio_bytes = base64.b64decode(voice_result['audioData'])
-                        # Use direct S3 client upload (same as talking photo) to ensure proper permissions
-                        timestamp = int(time.time())
-                        audio_filename = f"voice_dub_{dub_key}_{user_id}_{timestamp}.mp3"
-                        audio_object_name = f"voice_dubs/{audio_filename}"
+            # One voice dub pipeline slot for the whole job, fallbacks and saves included
+            async with voice_dub_pipeline_semaphore:
+                try:
+                    log_progress(f"AUDIO_{dub_key.upper()}", "Starting voice dubbing", "INFO")
+                    
+                    # Add timeout protection for voice dub generation
+                    audio_bytes = await asyncio.wait_for(
+                        convert_voice_dub(source_url, voice_id, dub_key.replace('_audio', '')),
+                        timeout=360  # 6 minutes timeout for voice dub (matches 5-minute polling + buffer)
+                    )
+                    
+                    if audio_bytes:
+                        # Handle S3 upload of the raw MP3 bytes
+                        try:
+                            # Use direct S3 client upload (same as talking photo) to ensure proper permissions
+                            timestamp = int(time.time())
+                            audio_filename = f"voice_dub_{dub_key}_{user_id}_{timestamp}.mp3"
+                            audio_object_name = f"voice_dubs/{audio_filename}"
+                            
+                            # Upload using direct S3 client with explicit permissions (same as talking photo);
+                            # a single PUT, since the MP3 is already in memory
+                            if not s3_client:
+                                raise Exception("S3 client not available")
+                            await asyncio.to_thread(
+                                s3_client.put_object,
+                                Bucket=S3_BUCKET_NAME,
+                                Key=audio_object_name,
+                                Body=audio_bytes,
+                                ACL='public-read',
+                                ContentType='audio/mpeg',
+                                CacheControl=IMMUTABLE_CACHE_CONTROL
+                            )
+                            
+                            # Use CloudFront CDN URL for faster audio delivery
+                            final_url = cdn_object_url(audio_object_name)
+                            log_progress(f"AUDIO_{dub_key.upper()}", "Generated and uploaded to S3 (direct method)", "SUCCESS")
+                        except Exception as s3_error:
+                            log_progress(f"AUDIO_{dub_key.upper()}", "S3 upload failed, using base64 fallback", "ERROR")
+                            final_url = f"data:audio/mpeg;base64,{base64.b64encode(audio_bytes).decode('ascii')}"
+                            log_progress(f"AUDIO_{dub_key.upper()}", "Generated (base64 fallback)", "SUCCESS")
                         
-                        # Create temporary file-like object for S3 upload
-                        from io import BytesIO
-                        audio_file = BytesIO(audio_bytes)
-                        audio_file.name = audio_filename
+                        # Save partial result (batched with other pipelines finishing now)
+                        partial_saves.put({f'{dub_key}_url': final_url})
+                        log_progress(f"AUDIO_{dub_key.upper()}", "URL queued for database", "SAVE")
                         
-                        # Upload using direct S3 client with explicit permissions (same as talking photo)
-                        if not s3_client:
-                            raise Exception("S3 client not available")
-                        s3_client.upload_fileobj(
-                            audio_file,
-                            S3_BUCKET_NAME,
-                            audio_object_name,
-                            ExtraArgs={'ACL': 'public-read', 'ContentType': 'audio/mpeg'}
-                        )
+                        return dub_key, final_url
+                    else:
+                        raise Exception("Voice dub returned no audio")
                         
-                        # Use CloudFront CDN URL for faster audio delivery
-                        final_url = f"https://{CLOUDFRONT_DOMAIN}/{audio_object_name}"
-                        log_progress(f"AUDIO_{dub_key.upper()}", "Generated and uploaded to S3 (direct method)", "SUCCESS")
-                    except Exception as s3_error:
-                        log_progress(f"AUDIO_{dub_key.upper()}", "S3 upload failed, using base64 fallback", "ERROR")
-                        audio_type = voice_result.get('audioType', 'audio/mpeg')
-                        final_url = f"data:{audio_type};base64,{voice_result['audioData']}"
-                        log_progress(f"AUDIO_{dub_key.upper()}", "Generated (base64 fallback)", "SUCCESS")
-                    
-                    # Save partial result immediately
-                    try:
-                        partial_update = {f'{dub_key}_url': final_url}
-                        supabase_service.update_user(user_id, partial_update)
-                        log_progress(f"AUDIO_{dub_key.upper()}", "URL saved to database", "SAVE")
-                    except Exception as save_error:
-                        log_progress(f"AUDIO_{dub_key.upper()}", f"Save failed: {save_error}", "ERROR")
-                    
-                    return dub_key, final_url
-                else:
-                    raise Exception(f"Voice dub failed or returned invalid format: {voice_result}")
-                    
-            except asyncio.TimeoutError:
-                log_progress(f"AUDIO_{dub_key.upper()}", "Timeout after 3 minutes", "ERROR")
-                return dub_key, None
-            except Exception as e:
-                log_progress(f"AUDIO_{dub_key.upper()}", f"Failed: {str(e)}", "ERROR")
-                return dub_key, None
+                except asyncio.TimeoutError:
+                    log_progress(f"AUDIO_{dub_key.upper()}", "Timeout after 3 minutes", "ERROR")
+                    return dub_key, None
+                except Exception as e:
+                    log_progress(f"AUDIO_{dub_key.upper()}", f"Failed: {str(e)}", "ERROR")
+                    return dub_key, None
         
         log_progress("PHASE_1", "Starting concurrent face swap generation (lottery + crime)", "PHASE")
         
@@ -2579,21 +3178,16 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
             for scenario_key, config in scenarios.items()
         ]
         
-        print(f"🔍 CRITICAL DEBUG: About to run asyncio.gather with {len(faceswap_tasks)} tasks")
-        print(f"  - Scenarios: {list(scenarios.keys())}")
-        print(f"  - Task types: {[type(task).__name__ for task in faceswap_tasks]}")
+        logger.debug("Running %d face swap tasks for user %s: %s", len(faceswap_tasks), user_id, list(scenarios))
         
         try:
             log_progress("GATHER_START", f"Starting asyncio.gather for {len(faceswap_tasks)} face swap tasks", "INFO")
             faceswap_results = await asyncio.gather(*faceswap_tasks, return_exceptions=True)
             log_progress("GATHER_SUCCESS", f"asyncio.gather completed with {len(faceswap_results)} results", "SUCCESS")
-            print(f"🔍 GATHER SUCCESS: Got {len(faceswap_results)} results")
-            print(f"  - Results types: {[type(r).__name__ for r in faceswap_results]}")
+            logger.debug("Face swap result types for user %s: %s", user_id, [type(r).__name__ for r in faceswap_results])
         except Exception as gather_error:
             log_progress("GATHER_CRASH", f"asyncio.gather failed: {type(gather_error).__name__}: {str(gather_error)}", "ERROR")
-            print(f"🚨 GATHER FAILED: {type(gather_error).__name__}: {str(gather_error)}")
-            import traceback
-            print(f"🚨 GATHER TRACEBACK: {traceback.format_exc()}")
+            logger.exception("🚨 Face swap gather failed for user %s", user_id)
             raise
         
         # Process face swap results
@@ -2670,7 +3264,8 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
         if success_items:
             log_progress("SUCCESS_LIST", ", ".join(success_items), "SUCCESS")
         
-        # Final status update
+        # Final status update, after the queued partial results are written
+        await partial_saves.close()
         final_status = 'completed' if len(generation_errors) == 0 else 'partial_success'
         
         if generated_urls:
@@ -2679,13 +3274,13 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
                 status_update = {'pre_generation_status': final_status}
                 if generation_errors:
                     status_update['pre_generation_error'] = f"Partial success: {'; '.join(generation_errors[:3])}"  # Limit error length
-                supabase_service.update_user(user_id, status_update)
+                await asyncio.to_thread(update_user_row, user_id, status_update)
                 log_progress("FINAL_STATUS", f"Set to '{final_status}' in database", "SAVE")
             except Exception as final_error:
                 log_progress("FINAL_STATUS", f"Database update failed: {final_error}", "ERROR")
         else:
             try:
-                supabase_service.update_user(user_id, {
+                await asyncio.to_thread(update_user_row, user_id, {
                     'pre_generation_status': 'failed',
                     'pre_generation_error': f"Complete failure: {'; '.join(generation_errors[:3])}"
                 })
@@ -2697,15 +3292,19 @@ async def generate_scenario_content_simple(user_id: int, user_image_url: str, vo
             
     except Exception as e:
         log_progress("FATAL_ERROR", f"Scenario generation crashed: {type(e).__name__}: {str(e)}", "ERROR")
+        await partial_saves.close()
         
         try:
-            supabase_service.update_user(user_id, {
+            await asyncio.to_thread(update_user_row, user_id, {
                 'pre_generation_status': 'failed',
                 'pre_generation_error': str(e)
             })
             log_progress("ERROR_STATUS", "Database updated with fatal error", "SAVE")
         except Exception as db_error:
             log_progress("ERROR_STATUS", f"Could not update database: {db_error}", "ERROR")
+    finally:
+        # Also flush when the task is cancelled (e.g. at shutdown)
+        await partial_saves.close()
 
 async def generate_voice_dubs_only(user_id: int, user_name: str, voice_id: str):
     """Generate only voice dubs (separated from video generation for parallel processing)"""
@@ -2714,10 +3313,7 @@ async def generate_voice_dubs_only(user_id: int, user_name: str, voice_id: str):
         print(f"   - User: {user_name}")
         print(f"   - Voice ID: {voice_id}")
         
-        voice_sources = {
-            'investment_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice1.mp3',
-            'accident_call_audio': 'https://d3srmxrzq4dz1v.cloudfront.net/video-url/voice2.mp3'
-        }
+        voice_sources = VOICE_DUB_SOURCES
         
         generated_voice_content = {}
         
@@ -2725,54 +3321,41 @@ async def generate_voice_dubs_only(user_id: int, user_name: str, voice_id: str):
             print(f"🔄 Generating {dub_key}...")
             try:
                 # Add timeout protection for voice dub generation
-                voice_result = await asyncio.wait_for(
-                    generate_voice_dub({
-                        "audioUrl": source_url,
-                        "voiceId": voice_id,
-                        "scenarioType": dub_key.replace('_audio', '')
-                    }),
-                    timeout=360  # 6 minutes timeout for voice dub
-                )
+                async with voice_dub_pipeline_semaphore:
+                    audio_bytes = await asyncio.wait_for(
+                        convert_voice_dub(source_url, voice_id, dub_key.replace('_audio', '')),
+                        timeout=360  # 6 minutes timeout for voice dub
+                    )
                 
-                if voice_result and voice_result.get('audioData'):
+                if audio_bytes:
                     # Upload voice dub to S3 and get CDN URL
                     try:
-                        import base64
-                        from io import BytesIO
-                        import time
-                        import uuid
-                        
-                        # Decode base64 audio data
-                        audio_bytes = base64.b64decode(voice_result['audioData'])
-                        
                         # Create unique filename
                         timestamp = int(time.time())
-                        safe_user_name = user_name.replace(' ', '_')[:20] if user_name else "user"
+                        safe_user_name = _safe_user_name(user_name)
                         audio_filename = f"voice_dub_{dub_key}_{safe_user_name}_{timestamp}_{uuid.uuid4().hex[:6]}.mp3"
                         audio_object_name = f"voice_dubs/{safe_user_name}/{audio_filename}"
                         
-                        # Upload to S3
-                        audio_file = BytesIO(audio_bytes)
-                        audio_file.name = audio_filename
-                        
-                        s3_client.upload_fileobj(
-                            audio_file, S3_BUCKET_NAME, audio_object_name,
-                            ExtraArgs={
-                                'ACL': 'public-read',
-                                'ContentType': 'audio/mpeg',
-                                'CacheControl': 'max-age=31536000'
-                            }
+                        # Upload to S3 in a single PUT (the MP3 is already in memory), off the event loop
+                        await asyncio.to_thread(
+                            s3_client.put_object,
+                            Bucket=S3_BUCKET_NAME,
+                            Key=audio_object_name,
+                            Body=audio_bytes,
+                            ACL='public-read',
+                            ContentType='audio/mpeg',
+                            CacheControl=IMMUTABLE_CACHE_CONTROL
                         )
                         
                         # Use CloudFront CDN URL
-                        cdn_url = f"https://{CLOUDFRONT_DOMAIN}/{audio_object_name}"
+                        cdn_url = cdn_object_url(audio_object_name)
                         generated_voice_content[dub_key + '_url'] = cdn_url
                         print(f"✅ {dub_key} completed - uploaded to CDN: {cdn_url}")
                         
                         # Save individual voice dub immediately
                         try:
                             partial_update = {f'{dub_key}_url': cdn_url}
-                            supabase_service.update_user(user_id, partial_update)
+                            await asyncio.to_thread(update_user_row, user_id, partial_update)
                             print(f"✅ {dub_key} URL saved to database")
                         except Exception as save_error:
                             print(f"⚠️ DB save warning for {dub_key}: {save_error}")
@@ -2780,14 +3363,14 @@ async def generate_voice_dubs_only(user_id: int, user_name: str, voice_id: str):
                     except Exception as upload_error:
                         print(f"⚠️ S3 upload failed for {dub_key}: {upload_error}")
                         # Fallback to base64 data URL
-                        audio_data_url = f"data:audio/mpeg;base64,{voice_result['audioData']}"
+                        audio_data_url = f"data:audio/mpeg;base64,{base64.b64encode(audio_bytes).decode('ascii')}"
                         generated_voice_content[dub_key + '_url'] = audio_data_url
                         print(f"✅ {dub_key} completed - using base64 fallback")
                         
                         # Save fallback URL
                         try:
                             partial_update = {f'{dub_key}_url': audio_data_url}
-                            supabase_service.update_user(user_id, partial_update)
+                            await asyncio.to_thread(update_user_row, user_id, partial_update)
                             print(f"✅ {dub_key} fallback URL saved to database")
                         except Exception as save_error:
                             print(f"⚠️ DB save warning for {dub_key}: {save_error}")
@@ -2803,9 +3386,7 @@ async def generate_voice_dubs_only(user_id: int, user_name: str, voice_id: str):
         return generated_voice_content
         
     except Exception as e:
-        print(f"🚨 VOICE GENERATION FAILED: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"🚨 FULL TRACEBACK: {traceback.format_exc()}")
+        logger.exception("🚨 Voice generation failed for user %s: %s: %s", user_id, type(e).__name__, e)
         return {}
 
 @app.post("/api/fix-voice-dub-permissions/{user_id}")
@@ -2818,7 +3399,7 @@ async def fix_voice_dub_permissions(user_id: int):
         if not s3_client:
             raise HTTPException(status_code=503, detail="S3 client not available")
         
-        user = supabase_service.get_user(user_id)
+        user = await asyncio.to_thread(supabase_service.get_user, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
@@ -2837,7 +3418,7 @@ async def fix_voice_dub_permissions(user_id: int):
                 return None
             # Remove CloudFront domain and extract the key
             if CLOUDFRONT_DOMAIN in url:
-                return url.split(f"https://{CLOUDFRONT_DOMAIN}/")[-1]
+                return url.split(CDN_BASE_URL)[-1]
             elif ".amazonaws.com" in url:
                 # Handle direct S3 URLs
                 parts = url.split(".amazonaws.com/")
@@ -2857,7 +3438,7 @@ async def fix_voice_dub_permissions(user_id: int):
                         Key=s3_key,
                         ACL='public-read'
                     )
-                    new_url = f"https://{CLOUDFRONT_DOMAIN}/{s3_key}"
+                    new_url = cdn_object_url(s3_key)
                     print(f"  ✅ Fixed permissions via ACL for {url_type}")
                     return new_url
                     
@@ -2891,7 +3472,7 @@ async def fix_voice_dub_permissions(user_id: int):
                         ACL='public-read'
                     )
                     
-                    new_url = f"https://{CLOUDFRONT_DOMAIN}/{new_s3_key}"
+                    new_url = cdn_object_url(new_s3_key)
                     print(f"  ✅ Fixed permissions via copy for {url_type}: {new_s3_key}")
                     return new_url
                 
@@ -2901,61 +3482,53 @@ async def fix_voice_dub_permissions(user_id: int):
                 errors.append(error_msg)
                 return None
         
-        # Fix investment call audio permissions
-        if investment_url:
-            investment_key = extract_s3_key_from_url(investment_url)
-            if investment_key:
-                new_investment_url = fix_s3_object_permissions(investment_key, "investment_call_audio")
-                if new_investment_url:
-                    fixed_urls['investment_call_audio_url'] = new_investment_url
-            else:
-                errors.append("Could not extract S3 key from investment_call_audio_url")
-        else:
-            errors.append("No investment_call_audio_url found in user data")
-        
-        # Fix accident call audio permissions
-        if accident_url:
-            accident_key = extract_s3_key_from_url(accident_url)
-            if accident_key:
-                new_accident_url = fix_s3_object_permissions(accident_key, "accident_call_audio")
-                if new_accident_url:
-                    fixed_urls['accident_call_audio_url'] = new_accident_url
-            else:
-                errors.append("Could not extract S3 key from accident_call_audio_url")
-        else:
-            errors.append("No accident_call_audio_url found in user data")
+        # Fix both audio files at once; each fix is one or two blocking S3 calls
+        fix_jobs = {}
+        for url_type, url in (("investment_call_audio", investment_url), ("accident_call_audio", accident_url)):
+            if not url:
+                errors.append(f"No {url_type}_url found in user data")
+                continue
+            s3_key = extract_s3_key_from_url(url)
+            if not s3_key:
+                errors.append(f"Could not extract S3 key from {url_type}_url")
+                continue
+            fix_jobs[url_type] = asyncio.to_thread(fix_s3_object_permissions, s3_key, url_type)
+        
+        for url_type, new_url in zip(fix_jobs, await asyncio.gather(*fix_jobs.values())):
+            if new_url:
+                fixed_urls[f"{url_type}_url"] = new_url
         
         # Update database with any fixed URLs
         if fixed_urls:
             try:
-                supabase_service.update_user(user_id, fixed_urls)
+                await asyncio.to_thread(update_user_row, user_id, fixed_urls)
                 print(f"  ✅ Updated database with {len(fixed_urls)} fixed URLs")
             except Exception as db_error:
                 error_msg = f"Failed to update database: {str(db_error)}"
                 print(f"  ❌ {error_msg}")
                 errors.append(error_msg)
         
-        # Test accessibility of fixed URLs
-        accessible_urls = {}
-        if fixed_urls:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                for url_type, url in fixed_urls.items():
-                    try:
-                        response = await client.head(url)
-                        accessible_urls[url_type] = {
-                            "url": url,
-                            "status_code": response.status_code,
-                            "accessible": response.status_code == 200
-                        }
-                        print(f"  🔍 {url_type} accessibility test: {response.status_code}")
-                    except Exception as test_error:
-                        accessible_urls[url_type] = {
-                            "url": url,
-                            "status_code": None,
-                            "accessible": False,
-                            "error": str(test_error)
-                        }
-                        print(f"  ❌ {url_type} accessibility test failed: {test_error}")
+        # Test accessibility of fixed URLs (probes run concurrently on the shared client)
+        async def probe_url(url_type: str, url: str) -> dict:
+            try:
+                response = await get_http_client().head(url, timeout=10.0)
+                print(f"  🔍 {url_type} accessibility test: {response.status_code}")
+                return {
+                    "url": url,
+                    "status_code": response.status_code,
+                    "accessible": response.status_code == 200
+                }
+            except Exception as test_error:
+                print(f"  ❌ {url_type} accessibility test failed: {test_error}")
+                return {
+                    "url": url,
+                    "status_code": None,
+                    "accessible": False,
+                    "error": str(test_error)
+                }
+        
+        probe_results = await asyncio.gather(*(probe_url(url_type, url) for url_type, url in fixed_urls.items()))
+        accessible_urls = dict(zip(fixed_urls, probe_results))
         
         print(f"🔧 COMPLETED: Voice dub permission fix for user {user_id}")
         print(f"  - Fixed URLs: {len(fixed_urls)}")
@@ -2979,13 +3552,13 @@ async def fix_voice_dub_permissions(user_id: int):
         raise HTTPException(status_code=500, detail=f"Failed to fix voice dub permissions: {str(e)}")
 
 @app.get("/api/debug-scenario-generation/{user_id}")
-async def debug_scenario_generation(user_id: int):
+async def debug_scenario_generation(user_id: int, request: Request):
     """Debug endpoint to check scenario generation status and logs"""
     try:
         if not supabase_available or not supabase_service:
             return {"error": "Database service unavailable"}
         
-        user = supabase_service.get_user(user_id)
+        user = await asyncio.to_thread(supabase_service.get_user, user_id)
         if not user:
             return {"error": "User not found"}
         
@@ -3002,7 +3575,7 @@ async def debug_scenario_generation(user_id: int):
         # Count how many are completed
         completed_count = len([url for url in scenario_urls.values() if url])
         
-        return {
+        debug_status = {
             "user_id": user_id,
             "pre_generation_status": user.get('pre_generation_status', 'unknown'),
             "pre_generation_error": user.get('pre_generation_error'),
@@ -3016,8 +3589,34 @@ async def debug_scenario_generation(user_id: int):
                 "updated_at": user.get('updated_at')
             }
         }
+        return conditional_json_response(request, debug_status)
         
     except Exception as e:
         return {"error": f"Debug failed: {str(e)}"}
 
 
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # uvloop (libuv event loop) and httptools (C HTTP parser) ship with uvicorn[standard];
+    # fall back to the pure-Python defaults where they can't be installed (e.g. Windows)
+    try:
+        import uvloop  # noqa: F401
+        event_loop = "uvloop"
+    except ImportError:
+        event_loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http_impl = "httptools"
+    except ImportError:
+        http_impl = "h11"
+    
+    uvicorn.run(
+        "api.main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop=event_loop,
+        http=http_impl,
+    )
@@ -0,0 +1,164 @@
+import hmac
+import logging
+import orjson
+from typing import FrozenSet
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+
+class CORSAndErrorASGI:
+    """Pure ASGI middleware that adds CORS headers, answers preflights and turns
+    unhandled exceptions into a JSON 500, without allocating Request/Response
+    objects per request the way BaseHTTPMiddleware and exception handlers do"""
+
+    ALLOW_METHODS = b"GET, POST, PUT, DELETE, OPTIONS"
+    DEFAULT_ALLOW_HEADERS = b"Content-Type, Authorization"
+    MAX_AGE = b"86400"
+    # Custom response headers the browser may read (binary endpoints carry ids here)
+    EXPOSE_HEADERS = b"X-Dubbing-Id"
+
+    FORBIDDEN_BODY = b'{"detail":"Forbidden"}'
+    FORBIDDEN_HEADERS = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(FORBIDDEN_BODY)).encode("latin-1")),
+    ]
+
+    def __init__(self, app, allowed_origins: FrozenSet[bytes]):
+        self.app = app
+        self.allowed_origins = allowed_origins
+        # Headers appended to every response, per origin; the dict lookup doubles
+        # as the allowed-origin check
+        self.response_headers = {
+            origin: [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-expose-headers", self.EXPOSE_HEADERS),
+                (b"vary", b"Origin"),
+            ]
+            for origin in allowed_origins
+        }
+        # Preflight headers per origin, built once; only Allow-Headers varies
+        # per request (when the browser asks for specific headers)
+        self.preflight_headers = {
+            origin: [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-methods", self.ALLOW_METHODS),
+                (b"access-control-allow-credentials", b"true"),
+                (b"access-control-max-age", self.MAX_AGE),
+                (b"vary", b"Origin"),
+            ]
+            for origin in allowed_origins
+        }
+        self.default_preflight_headers = {
+            origin: [*headers, (b"access-control-allow-headers", self.DEFAULT_ALLOW_HEADERS)]
+            for origin, headers in self.preflight_headers.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        cors_headers = self.response_headers.get(origin)
+        if cors_headers is None:
+            origin = None
+
+        if scope["method"] == "OPTIONS":
+            await self._preflight(send, origin, request_headers)
+            return
+
+        response_started = False
+
+        async def send_with_cors(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                if cors_headers is not None:
+                    headers = message.setdefault("headers", [])
+                    if isinstance(headers, list):
+                        headers.extend(cors_headers)
+                    else:
+                        message["headers"] = [*headers, *cors_headers]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cors)
+        except Exception as exc:
+            logger.exception("❌ Unhandled error on %s %s: %s", scope["method"], scope["path"], exc)
+            if response_started:
+                raise
+            body = orjson.dumps({"detail": f"Internal server error: {str(exc)}"})
+            await send_with_cors({
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+
+    async def _preflight(self, send, origin, request_headers):
+        if origin is None:
+            await send({"type": "http.response.start", "status": 403, "headers": self.FORBIDDEN_HEADERS})
+            await send({"type": "http.response.body", "body": self.FORBIDDEN_BODY})
+            return
+
+        if request_headers:
+            headers = [*self.preflight_headers[origin], (b"access-control-allow-headers", request_headers)]
+        else:
+            headers = self.default_preflight_headers[origin]
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+
+class ProfilingASGI:
+    """Pure ASGI middleware that runs a request under pyinstrument and returns the
+    HTML report instead of the normal response when the URL carries
+    ?profile=1&profile_token=<PROFILING_TOKEN>"""
+
+    def __init__(self, app, token: str, profiler_cls):
+        self.app = app
+        self.token = token
+        self.profiler_cls = profiler_cls
+
+    def _wants_profile(self, query_string: bytes) -> bool:
+        if b"profile=1" not in query_string:
+            return False
+        params = parse_qs(query_string.decode("latin-1"))
+        supplied = params.get("profile_token", [""])[0]
+        return params.get("profile") == ["1"] and hmac.compare_digest(supplied, self.token)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope.get("query_string", b"")):
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message):
+            pass
+
+        profiler = self.profiler_cls(async_mode="enabled", interval=0.001)
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        body = profiler.output_html().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/html; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,11 +1,81 @@
-import os
 import uuid
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from fastapi import HTTPException
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError, ClientError
 from typing import Optional
 import io
 
+from .settings import get_settings
+
+# Files over 8 MB go up as multipart uploads with up to 10 parts in flight
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True,
+)
+
+# Keep-alive pool big enough for parallel multipart parts from several requests
+# at once (botocore's default is 10 connections)
+S3_CLIENT_CONFIG = Config(max_pool_connections=50)
+
+# Lifetime of presigned upload URLs handed to the browser
+PRESIGNED_UPLOAD_EXPIRY_SECONDS = 900
+
+# What a browser may upload through a presigned POST, per folder: concrete media
+# types only (no SVG/HTML/JS, which would be served publicly from our domain) and
+# a maximum size enforced by S3 via content-length-range
+_IMAGE_TYPES = frozenset({'image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/webp'})
+_AUDIO_TYPES = frozenset({'audio/mpeg', 'audio/wav', 'audio/mp4'})
+_VIDEO_TYPES = frozenset({'video/mp4', 'video/quicktime'})
+PRESIGNED_UPLOAD_POLICIES = {
+    'user_uploads': (_IMAGE_TYPES | _AUDIO_TYPES, 25 * 1024 * 1024),
+    'images': (_IMAGE_TYPES, 10 * 1024 * 1024),
+    'audio': (_AUDIO_TYPES, 25 * 1024 * 1024),
+    'videos': (_VIDEO_TYPES, 200 * 1024 * 1024),
+}
+
+# Every object key is unique per upload (UUID or content hash) and never
+# rewritten, so CloudFront and browsers can cache for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class IteratorReader(io.RawIOBase):
+    """Read-only, non-seekable file object over an iterator of byte chunks, so a
+    streaming producer (e.g. ElevenLabs TTS) can be passed to upload_fileobj.
+    read(n) always returns n bytes until the iterator is exhausted, since
+    s3transfer treats a short read as end of stream"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._exhausted and (size < 0 or len(self._buffer) < size):
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
 class S3Service:
     def __init__(self):
         self._s3_client = None
@@ -16,11 +86,12 @@ class S3Service:
         if self._initialized:
             return
             
-        self.bucket_name = os.getenv("S3_BUCKET_NAME")
-        self.aws_access_key_id = os.getenv("AWS_ACCESS_KEY_ID")
-        self.aws_secret_access_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-        self.aws_region = os.getenv("AWS_REGION")
-        self.cloudfront_domain = os.getenv("CLOUDFRONT_DOMAIN", "d3srmxrzq4dz1v.cloudfront.net")
+        settings = get_settings()
+        self.bucket_name = settings.s3_bucket_name
+        self.aws_access_key_id = settings.aws_access_key_id
+        self.aws_secret_access_key = settings.aws_secret_access_key
+        self.aws_region = settings.aws_region
+        self.cloudfront_domain = settings.cloudfront_domain
         
         if not all([self.bucket_name, self.aws_access_key_id, self.aws_secret_access_key, self.aws_region]):
             raise ValueError("S3 credentials not properly configured")
@@ -29,7 +100,8 @@ class S3Service:
             's3',
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key,
-            region_name=self.aws_region
+            region_name=self.aws_region,
+            config=S3_CLIENT_CONFIG
         )
         self._initialized = True
     
@@ -51,11 +123,7 @@ class S3Service:
         Returns:
             Public URL of the uploaded file
         """
-        if not filename:
-            file_extension = self._get_extension_from_content_type(content_type)
-            filename = f"{uuid.uuid4()}{file_extension}"
-        
-        key = f"{folder}/{filename}"
+        key = self._object_key(content_type, folder, filename)
         
         # Ensure S3 client is initialized
         self._ensure_initialized()
@@ -67,14 +135,58 @@ class S3Service:
                 Key=key,
                 Body=file_data,
                 ContentType=content_type,
+                CacheControl=IMMUTABLE_CACHE_CONTROL,
                 ACL='public-read'  # Make file publicly accessible
             )
             
-            # Return CloudFront URL if available, otherwise S3 URL
-            if self.cloudfront_domain:
-                return f"https://{self.cloudfront_domain}/{key}"
-            else:
-                return f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{key}"
+            return self._public_url(key)
+                
+        except NoCredentialsError:
+            raise HTTPException(status_code=500, detail="AWS credentials not found")
+        except PartialCredentialsError:
+            raise HTTPException(status_code=500, detail="Incomplete AWS credentials")
+        except ClientError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to upload to S3: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Unexpected error during S3 upload: {str(e)}")
+
+    def upload_fileobj(self, fileobj, content_type: str, folder: str, filename: Optional[str] = None) -> str:
+        """
+        Stream a file-like object to S3 and return the public URL
+        
+        Unlike upload_file, the body is never loaded into memory as a whole:
+        boto3 reads it in chunks and switches to a parallel multipart upload for
+        files over TRANSFER_CONFIG.multipart_threshold.
+        Blocking; call via asyncio.to_thread from async code.
+        
+        Args:
+            fileobj: Readable binary file-like object, positioned at the start
+            content_type: MIME type of the file
+            folder: S3 folder/prefix (e.g., 'images', 'audio', 'videos')
+            filename: Optional filename. If not provided, generates UUID
+        
+        Returns:
+            Public URL of the uploaded file
+        """
+        key = self._object_key(content_type, folder, filename)
+        
+        # Ensure S3 client is initialized
+        self._ensure_initialized()
+        
+        try:
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                key,
+                ExtraArgs={
+                    'ContentType': content_type,
+                    'CacheControl': IMMUTABLE_CACHE_CONTROL,
+                    'ACL': 'public-read'  # Make file publicly accessible
+                },
+                Config=TRANSFER_CONFIG
+            )
+            
+            return self._public_url(key)
                 
         except NoCredentialsError:
             raise HTTPException(status_code=500, detail="AWS credentials not found")
@@ -85,6 +197,67 @@ class S3Service:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Unexpected error during S3 upload: {str(e)}")
 
+    def generate_presigned_upload(self, content_type: str, folder: str, filename: Optional[str] = None) -> dict:
+        """
+        Create a presigned POST so the client can upload directly to S3
+        
+        The browser sends a multipart/form-data POST to uploadUrl with every
+        entry of fields followed by the file. S3 rejects the upload if the
+        Content-Type differs or the size is outside PRESIGNED_UPLOAD_POLICIES.
+        
+        Args:
+            content_type: MIME type the client will upload
+            folder: S3 folder/prefix (e.g., 'images', 'audio', 'videos')
+            filename: Optional filename. If not provided, generates UUID
+        
+        Returns:
+            Dict with the presigned uploadUrl and form fields, the eventual public fileUrl and the key
+        """
+        content_type = content_type.lower()
+        policy = PRESIGNED_UPLOAD_POLICIES.get(folder)
+        if policy is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported folder: {folder}")
+        allowed_types, max_bytes = policy
+        if content_type not in allowed_types:
+            raise HTTPException(status_code=400, detail=f"Unsupported content type for {folder}: {content_type}")
+        
+        key = self._object_key(content_type, folder, filename)
+        
+        # Ensure S3 client is initialized
+        self._ensure_initialized()
+        
+        fields = {
+            'acl': 'public-read',
+            'Content-Type': content_type,
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL
+        }
+        try:
+            presigned = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=key,
+                Fields=fields,
+                Conditions=[
+                    {'acl': 'public-read'},
+                    {'Content-Type': content_type},
+                    {'Cache-Control': IMMUTABLE_CACHE_CONTROL},
+                    ['content-length-range', 1, max_bytes]
+                ],
+                ExpiresIn=PRESIGNED_UPLOAD_EXPIRY_SECONDS
+            )
+        except (NoCredentialsError, PartialCredentialsError):
+            raise HTTPException(status_code=500, detail="AWS credentials not found")
+        except ClientError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to presign S3 upload: {str(e)}")
+        
+        return {
+            "uploadUrl": presigned["url"],
+            "fields": presigned["fields"],
+            "fileUrl": self._public_url(key),
+            "key": key,
+            "maxBytes": max_bytes,
+            "expiresIn": PRESIGNED_UPLOAD_EXPIRY_SECONDS
+        }
+
     def upload_from_url(self, source_url: str, folder: str, filename: Optional[str] = None) -> str:
         """
         Download file from URL and upload to S3
@@ -113,6 +286,19 @@ class S3Service:
         except httpx.HTTPError as e:
             raise HTTPException(status_code=500, detail=f"Failed to download file from {source_url}: {str(e)}")
 
+    def _object_key(self, content_type: str, folder: str, filename: Optional[str]) -> str:
+        """Build the S3 key, generating a UUID filename when none is given"""
+        if not filename:
+            file_extension = self._get_extension_from_content_type(content_type)
+            filename = f"{uuid.uuid4()}{file_extension}"
+        return f"{folder}/{filename}"
+
+    def _public_url(self, key: str) -> str:
+        """Return CloudFront URL if available, otherwise S3 URL"""
+        if self.cloudfront_domain:
+            return f"https://{self.cloudfront_domain}/{key}"
+        return f"https://{self.bucket_name}.s3.{self.aws_region}.amazonaws.com/{key}"
+
     def _get_extension_from_content_type(self, content_type: str) -> str:
         """Get file extension from MIME type"""
         content_type_map = {
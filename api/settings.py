@@ -0,0 +1,65 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# Load .env before anything reads the environment
+load_dotenv()
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Environment configuration, read once at startup"""
+
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+    s3_bucket_name: Optional[str]
+    aws_access_key_id: Optional[str]
+    aws_secret_access_key: Optional[str]
+    aws_region: Optional[str]
+    cloudfront_domain: str
+    openai_api_key: Optional[str]
+    elevenlabs_api_key: Optional[str]
+    akool_client_id: Optional[str]
+    akool_client_secret: Optional[str]
+    akool_api_key: Optional[str]  # Direct token, kept for backward compatibility
+    akool_token_cache_path: str  # Token file shared by the API workers and the scripts
+    profiling: bool
+    profiling_token: Optional[str]
+    logging_level: str
+    akool_max_concurrency: int
+    elevenlabs_max_concurrency: int
+    akool_cdn_proxy_prefix: Optional[str]  # CloudFront path fronting Akool's CDN, e.g. "akool-proxy"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_KEY"),
+        s3_bucket_name=os.getenv("S3_BUCKET_NAME"),
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+        aws_region=os.getenv("AWS_REGION"),
+        cloudfront_domain=os.getenv("CLOUDFRONT_DOMAIN", "d3srmxrzq4dz1v.cloudfront.net"),
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        elevenlabs_api_key=os.getenv("ELEVENLABS_API_KEY"),
+        akool_client_id=os.getenv("AKOOL_CLIENT_ID"),
+        akool_client_secret=os.getenv("AKOOL_CLIENT_SECRET"),
+        akool_api_key=os.getenv("AKOOL_API_KEY"),
+        akool_token_cache_path=os.getenv(
+            "AKOOL_TOKEN_CACHE_PATH", os.path.join(tempfile.gettempdir(), "akool_token.json")
+        ),
+        profiling=os.getenv("PROFILING") == "1",
+        profiling_token=os.getenv("PROFILING_TOKEN"),
+        logging_level=os.getenv("LOGGING_LEVEL", "INFO").upper(),
+        akool_max_concurrency=int(os.getenv("AKOOL_MAX_CONCURRENCY", "8")),
+        elevenlabs_max_concurrency=int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "4")),
+        akool_cdn_proxy_prefix=os.getenv("AKOOL_CDN_PROXY_PREFIX", "").strip("/") or None,
+    )
+
+
+settings = get_settings()
@@ -1,8 +1,19 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+# Validation-light config for the wide user models: drop unknown keys, no
+# re-validation on assignment, no string stripping
+_USER_MODEL_CONFIG = ConfigDict(
+    extra='ignore',
+    validate_assignment=False,
+    arbitrary_types_allowed=False,
+    str_strip_whitespace=False,
+)
+
 class UserBase(BaseModel):
+    model_config = _USER_MODEL_CONFIG
+    
     name: str
     age: int
     gender: str
@@ -12,12 +23,14 @@ class UserBase(BaseModel):
     talking_photo_url: Optional[str] = None
     current_page: Optional[str] = None
     current_step: Optional[int] = 0
-    completed_modules: Optional[List[str]] = []
+    completed_modules: Optional[List[str]] = Field(default_factory=list)
 
 class UserCreate(UserBase):
     pass
 
 class UserUpdate(BaseModel):
+    model_config = _USER_MODEL_CONFIG
+    
     name: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[str] = None
@@ -34,8 +47,7 @@ class User(UserBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(**_USER_MODEL_CONFIG, from_attributes=True)
 
 class QuizAnswerBase(BaseModel):
     user_id: int
@@ -50,8 +62,7 @@ class QuizAnswer(QuizAnswerBase):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserProgressUpdate(BaseModel):
     currentPage: Optional[str] = None
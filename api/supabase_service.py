@@ -1,15 +1,15 @@
-import os
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List
 from supabase import create_client, Client
-from dotenv import load_dotenv
 import json
 
-load_dotenv()
+from .settings import get_settings
 
 class SupabaseService:
     def __init__(self):
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.supabase_key = os.getenv("SUPABASE_KEY")
+        settings = get_settings()
+        self.supabase_url = settings.supabase_url
+        self.supabase_key = settings.supabase_key
         
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY environment variables are required")
@@ -37,23 +37,17 @@ class SupabaseService:
     
     def test_connection(self):
         """Test the Supabase connection"""
+        # One round-trip on the client's pooled PostgREST session. PostgREST doesn't
+        # expose information_schema, so probing it first only added a failing request.
         try:
-            # Simple test query to verify connection
-            result = self.client.table('information_schema.tables').select('table_name').limit(1).execute()
+            self.client.table('users').select('id').limit(1).execute()
             return True
         except Exception as e:
-            # If the above fails, try a different approach
-            try:
-                # Try to access any table - this will fail gracefully if no connection
-                result = self.client.table('users').select('id').limit(1).execute()
+            if 'does not exist' in str(e).lower():
+                # Connection works, table just doesn't exist
                 return True
-            except Exception as e2:
-                if 'does not exist' in str(e2).lower():
-                    # Connection works, table just doesn't exist
-                    return True
-                else:
-                    # Real connection error
-                    raise e2
+            # Real connection error
+            raise
     
     def create_tables(self):
         """Create the necessary tables in Supabase using SQL queries"""
@@ -174,6 +168,16 @@ class SupabaseService:
             print(f"❌ Error getting user: {e}")
             return None
     
+    def get_user_columns(self, user_id: int, columns: str) -> Optional[Dict[str, Any]]:
+        """Get only the given comma-separated columns for a user, falling back to select("*")"""
+        try:
+            result = self.client.table('users').select(columns).eq('id', user_id).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            # A projected column may not exist yet on older schemas
+            print(f"⚠️ Projected user select failed, falling back to full row: {e}")
+            return self.get_user(user_id)
+    
     def get_user_by_voice_id(self, voice_id: str) -> Optional[Dict[str, Any]]:
         """Get user by voice_id"""
         try:
@@ -243,6 +247,26 @@ class SupabaseService:
             print(f"❌ Error saving quiz answer: {e}")
             raise
     
+    def save_quiz_answers_bulk(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Save several quiz answers in one INSERT (one PostgREST round-trip);
+        the inserted rows, ids included, come back in the same response"""
+        if not rows:
+            return []
+        try:
+            quiz_rows = [
+                {
+                    'user_id': row['user_id'],
+                    'module': row['module'],
+                    'answers': json.dumps(row['answers'])
+                }
+                for row in rows
+            ]
+            result = self.client.table('quiz_answers').insert(quiz_rows).execute()
+            return result.data or []
+        except Exception as e:
+            print(f"❌ Error saving quiz answers in bulk: {e}")
+            raise
+    
     def get_quiz_answers(self, user_id: int, module: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get quiz answers for a user"""
         try:
@@ -259,31 +283,26 @@ class SupabaseService:
     def health_check(self) -> bool:
         """Check if Supabase connection is working"""
         try:
-            # Simple connection test - just verify we can authenticate
-            # This will work even if no tables exist yet
-            tables = self.client.table('information_schema.tables').select('table_name').limit(1).execute()
+            self.test_connection()
             return True
         except Exception as e:
-            # If that fails, try another basic operation
-            try:
-                # Try to access the users table, even if it doesn't exist - connection error vs table error
-                result = self.client.table('users').select('id').limit(1).execute()
-                return True
-            except Exception as e2:
-                # Check if it's a connection error or just missing table
-                if 'does not exist' in str(e2):
-                    return True  # Connection works, table just doesn't exist yet
-                print(f"❌ Supabase health check failed: {e2}")
-                return False
+            print(f"❌ Supabase health check failed: {e}")
+            return False
 
     # ===================================================================================
     # SIMPLE SCENARIO STATUS METHODS  
     # ===================================================================================
     
+    SCENARIO_STATUS_COLUMNS = (
+        "pre_generation_status,pre_generation_started_at,pre_generation_completed_at,pre_generation_error,"
+        "lottery_faceswap_url,crime_faceswap_url,lottery_video_url,crime_video_url,"
+        "investment_call_audio_url,accident_call_audio_url"
+    )
+    
     def get_user_scenario_status(self, user_id: int):
         """Get scenario generation status for user (simple version)"""
         try:
-            user = self.get_user(user_id)
+            user = self.get_user_columns(user_id, self.SCENARIO_STATUS_COLUMNS)
             if not user:
                 return None
                 
@@ -304,5 +323,31 @@ class SupabaseService:
         except Exception as e:
             print(f"❌ Error getting user scenario status: {e}")
             return None
+    
+    def try_claim_scenario_generation(self, user_id: int, stale_after_seconds: int) -> bool:
+        """Atomically move a user to pre_generation_status='in_progress'.
+        
+        A single conditional UPDATE, so of several concurrent callers only one
+        gets the row back. Claimable: no status yet, any status other than
+        completed/in_progress, or an in_progress run started longer than
+        stale_after_seconds ago (assumed dead).
+        """
+        now = datetime.now(timezone.utc)
+        stale_cutoff = (now - timedelta(seconds=stale_after_seconds)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        result = (
+            self.client.table('users')
+            .update({
+                'pre_generation_status': 'in_progress',
+                'pre_generation_started_at': now.isoformat()
+            })
+            .eq('id', user_id)
+            .or_(
+                'pre_generation_status.is.null,'
+                'pre_generation_status.not.in.(completed,in_progress),'
+                f'and(pre_generation_status.eq.in_progress,pre_generation_started_at.lt."{stale_cutoff}")'
+            )
+            .execute()
+        )
+        return bool(result.data)
 
 # Note: SupabaseService is now instantiated directly in main.py
\ No newline at end of file